@@ -1,13 +1,32 @@
 # Dependency injection
-from typing import Generator
-from fastapi import Depends
+from typing import Generator, Optional
+from fastapi import Depends, HTTPException
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import SQLAlchemyError
 
-# TODO: Add database session dependency
-def get_db():
-    """Database session dependency"""
-    pass
+from ..services.database_service import database_service
+
+
+def get_db() -> Generator[Optional[Connection], None, None]:
+    """
+    Pooled connection for the current database, or None when not connected
+    (the services report the missing connection in their own responses).
+    FastAPI caches dependencies per request, so every consumer in a request
+    shares one checked-out connection, returned to the pool afterwards.
+    """
+    current_db = database_service.get_current_database()
+    if current_db is None:
+        yield None
+        return
+
+    try:
+        conn = current_db._engine.connect()
+    except SQLAlchemyError as e:
+        raise HTTPException(status_code=503, detail=f"Database connection failed: {str(e)}")
+    with conn:
+        yield conn
 
 # TODO: Add authentication dependency
 def get_current_user():
     """Current user dependency"""
-    pass 
\ No newline at end of file
+    pass
@@ -1,19 +1,34 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import Dict, Any
+from fastapi import APIRouter, HTTPException, Depends, Response
+from pydantic import TypeAdapter
+from sqlalchemy.engine import Connection
+from typing import Dict, Any, Optional
+import asyncio
 import logging
 
-from services.database_service import database_service
-from models.requests import DatabaseConnectionRequest
-from models.responses import (
+from app.api.dependencies import get_db
+from app.services.database_service import database_service
+from app.models.requests import DatabaseConnectionRequest
+from app.models.responses import (
     DatabaseConnectionResponse,
     ConnectionStatusResponse,
     TablesResponse,
-    TestConnectionResponse
+    TestConnectionResponse,
+    DisconnectResponse
 )
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/database", tags=["database"])
 
+# Built once; the polled read endpoints validate and encode through these
+# instead of constructing a model and re-serializing it per request
+_STATUS_RESP_ADAPTER = TypeAdapter(ConnectionStatusResponse)
+_TABLES_RESP_ADAPTER = TypeAdapter(TablesResponse)
+
+
+def _json_response(adapter: TypeAdapter, result: Dict[str, Any]) -> Response:
+    body = adapter.dump_json(adapter.validate_python(result))
+    return Response(content=body, media_type="application/json")
+
 
 @router.post("/connect/default", response_model=DatabaseConnectionResponse)
 async def connect_to_default_database():
@@ -35,7 +50,7 @@ async def connect_to_default_database():
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Unexpected error in connect_to_default_database: {str(e)}")
+        logger.error("Unexpected error in connect_to_default_database: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Internal server error during database connection"
@@ -62,7 +77,7 @@ async def connect_to_custom_database(request: DatabaseConnectionRequest):
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Unexpected error in connect_to_custom_database: {str(e)}")
+        logger.error("Unexpected error in connect_to_custom_database: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Internal server error during database connection"
@@ -76,10 +91,10 @@ async def get_connection_status():
     """
     try:
         result = database_service.get_current_connection_info()
-        return ConnectionStatusResponse(**result)
+        return _json_response(_STATUS_RESP_ADAPTER, result)
         
     except Exception as e:
-        logger.error(f"Error getting connection status: {str(e)}")
+        logger.error("Error getting connection status: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Failed to get connection status"
@@ -101,12 +116,12 @@ async def get_database_tables():
                 detail=result["error"]
             )
         
-        return TablesResponse(**result)
+        return _json_response(_TABLES_RESP_ADAPTER, result)
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error getting database tables: {str(e)}")
+        logger.error("Error getting database tables: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Failed to get database tables"
@@ -114,13 +129,13 @@ async def get_database_tables():
 
 
 @router.post("/test", response_model=TestConnectionResponse)
-async def test_database_connection():
+async def test_database_connection(conn: Optional[Connection] = Depends(get_db)):
     """
     Test the current database connection.
     Verifies that the database is accessible and responsive.
     """
     try:
-        result = database_service.test_current_connection()
+        result = await asyncio.to_thread(database_service.test_current_connection, conn)
         
         if not result["success"]:
             # Don't raise exception for failed test, just return the result
@@ -129,14 +144,14 @@ async def test_database_connection():
         return TestConnectionResponse(**result)
         
     except Exception as e:
-        logger.error(f"Error testing database connection: {str(e)}")
+        logger.error("Error testing database connection: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Failed to test database connection"
         )
 
 
-@router.post("/disconnect", response_model=Dict[str, Any])
+@router.post("/disconnect", response_model=DisconnectResponse)
 async def disconnect_database():
     """
     Disconnect from the current database.
@@ -155,7 +170,7 @@ async def disconnect_database():
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error disconnecting from database: {str(e)}")
+        logger.error("Error disconnecting from database: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Failed to disconnect from database"
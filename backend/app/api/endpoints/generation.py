@@ -1,16 +1,46 @@
 from __future__ import annotations
 from fastapi import APIRouter, HTTPException
-from typing import List, Dict, Optional
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, List, Dict, Optional, Tuple
+import asyncio
+import json
 import logging
 
 from ...models.requests import SQLGenerationRequest
-from ...models.responses import SQLGenerationResponse
-from ...services.sql_generation_service import generate_sql, generate_sql_with_examples
+from ...core.validators import validate_sql
+from ...models.responses import SQLGenerationResponse, BatchSQLGenerationItem, BatchSQLGenerationResponse
+from ...services.database_service import database_service
+from ...services.semantic_cache import semantic_cache
+from ...services.sql_generation_service import agenerate_sql, agenerate_sql_batch, get_cache_scope, stream_sql
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/generate", tags=["SQL Generation"])
 
 
+def _scope_dialect(scope: str) -> str:
+    """Dialect recorded in a cache scope; the connection may have changed since it was built"""
+    return scope.split(":", 1)[0]
+
+
+async def _generate_cached(query: str, examples: Optional[List[Dict[str, str]]] = None) -> SQLGenerationResponse:
+    """
+    Serve SQL from the semantic cache when an equivalent query was seen before,
+    otherwise call the LLM, validate the SQL and cache the result.
+    Only validated SQL is cached, and template hits are validated by the
+    cache after substitution, so cache hits skip validation here.
+    """
+    scope = await asyncio.to_thread(get_cache_scope, examples)
+    cached, q_vec = await semantic_cache.lookup(scope, query)
+    if cached is not None:
+        return cached
+
+    response = await agenerate_sql(query, examples)
+
+    validate_sql(response.sql, _scope_dialect(scope))
+    semantic_cache.store(scope, query, response, q_vec)
+    return response
+
+
 @router.post("/sql", response_model=SQLGenerationResponse)
 async def generate_sql_endpoint(request: SQLGenerationRequest):
     """
@@ -18,19 +48,127 @@ async def generate_sql_endpoint(request: SQLGenerationRequest):
     Requires an active database connection.
     """
     try:
-        if request.examples:
-            response = generate_sql_with_examples(request.query, request.examples)
-        else:
-            response = generate_sql(request.query)
+        response = await _generate_cached(request.query, request.examples)
         
-        logger.info(f"Generated SQL for query: '{request.query[:50]}...' (confidence: {response.confidence})")
+        logger.info("Generated SQL for query: '%s...' (confidence: %s)", request.query[:50], response.confidence)
         return response
         
     except ValueError as e:
-        logger.error(f"SQL generation failed: {str(e)}")
+        logger.error("SQL generation failed: %s", e)
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error("Unexpected error in SQL generation: %s", e)
+        raise HTTPException(status_code=500, detail="Internal server error during SQL generation")
+
+
+def _sse(data: str, event: Optional[str] = None) -> str:
+    """Format one server-sent event"""
+    return f"event: {event}\ndata: {data}\n\n" if event else f"data: {data}\n\n"
+
+
+@router.post("/sql/stream")
+async def generate_sql_stream(request: SQLGenerationRequest):
+    """
+    Generate SQL from natural language query, streamed as server-sent events.
+    Emits {"delta": ...} events while the model generates, then a "result"
+    event with the full SQLGenerationResponse (or an "error" event).
+    """
+    try:
+        scope = await asyncio.to_thread(get_cache_scope, request.examples)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def events() -> AsyncIterator[str]:
+        try:
+            cached, q_vec = await semantic_cache.lookup(scope, request.query)
+            if cached is not None:
+                yield _sse(cached.model_dump_json(), event="result")
+                return
+
+            async for item in stream_sql(request.query, request.examples):
+                if isinstance(item, str):
+                    yield _sse(json.dumps({"delta": item}))
+                    continue
+
+                validate_sql(item.sql, _scope_dialect(scope))
+                semantic_cache.store(scope, request.query, item, q_vec)
+                logger.info("Streamed SQL for query: '%s...' (confidence: %s)", request.query[:50], item.confidence)
+                yield _sse(item.model_dump_json(), event="result")
+        except ValueError as e:
+            logger.error("SQL generation failed: %s", e)
+            yield _sse(json.dumps({"detail": str(e)}), event="error")
+        except Exception as e:
+            logger.error("Unexpected error in SQL generation: %s", e)
+            yield _sse(json.dumps({"detail": "Internal server error during SQL generation"}), event="error")
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@router.post("/sql/batch", response_model=BatchSQLGenerationResponse)
+async def generate_sql_batch_endpoint(requests: List[SQLGenerationRequest]):
+    """
+    Generate SQL for several natural language queries.
+    Duplicate queries are generated once and cache hits are answered directly;
+    the remaining queries go to the LLM in one call per distinct set of examples.
+    """
+    if not requests:
+        raise HTTPException(status_code=400, detail="No queries provided")
+
+    try:
+        # Group equivalent queries: (scope, cache key) -> (query, request indices)
+        scope_examples: Dict[str, Optional[List[Dict[str, str]]]] = {}
+        groups: Dict[Tuple[str, bytes], Tuple[str, List[int]]] = {}
+        for i, req in enumerate(requests):
+            scope = next((s for s, ex in scope_examples.items() if ex == req.examples), None)
+            if scope is None:
+                scope = await asyncio.to_thread(get_cache_scope, req.examples)
+                scope_examples[scope] = req.examples
+            key = (scope, semantic_cache.key(scope, req.query))
+            if key in groups:
+                groups[key][1].append(i)
+            else:
+                groups[key] = (req.query, [i])
+
+        lookups = await asyncio.gather(*(semantic_cache.lookup(scope, query) for (scope, _), (query, _) in groups.items()))
+
+        results: List[Optional[BatchSQLGenerationItem]] = [None] * len(requests)
+        misses: Dict[str, List[Tuple[str, Optional[List[float]], List[int]]]] = {}
+        cache_hits = 0
+        for ((scope, _), (query, indices)), (cached, q_vec) in zip(groups.items(), lookups):
+            if cached is not None:
+                cache_hits += len(indices)
+                for i in indices:
+                    results[i] = BatchSQLGenerationItem(success=True, response=cached)
+            else:
+                misses.setdefault(scope, []).append((query, q_vec, indices))
+
+        async def generate_scope(scope: str, entries: List[Tuple[str, Optional[List[float]], List[int]]]):
+            try:
+                return await agenerate_sql_batch([query for query, _, _ in entries], scope_examples[scope])
+            except ValueError as e:
+                return [{"success": False, "error": str(e), "response": None}] * len(entries)
+
+        generated = await asyncio.gather(*(generate_scope(scope, entries) for scope, entries in misses.items()))
+
+        for (scope, entries), scope_results in zip(misses.items(), generated):
+            for (query, q_vec, indices), result in zip(entries, scope_results):
+                if result["success"]:
+                    try:
+                        validate_sql(result["response"].sql, _scope_dialect(scope))
+                        semantic_cache.store(scope, query, result["response"], q_vec)
+                    except ValueError as e:
+                        result = {"success": False, "error": str(e), "response": None}
+                for i in indices:
+                    results[i] = BatchSQLGenerationItem(**result)
+
+        logger.info("Generated SQL batch of %s queries (%s cache hits, %s LLM calls)", len(requests), cache_hits, len(misses))
+        return BatchSQLGenerationResponse(results=results, cache_hits=cache_hits, llm_calls=len(misses))
+
+    except ValueError as e:
+        logger.error("Batch SQL generation failed: %s", e)
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        logger.error(f"Unexpected error in SQL generation: {str(e)}")
+        logger.error("Unexpected error in batch SQL generation: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error during SQL generation")
 
 
@@ -40,15 +178,15 @@ async def generate_sql_simple(query: str):
     Simple SQL generation endpoint that accepts just a query string.
     """
     try:
-        response = generate_sql(query)
-        logger.info(f"Generated SQL for simple query: '{query[:50]}...'")
+        response = await _generate_cached(query)
+        logger.info("Generated SQL for simple query: '%s...'", query[:50])
         return response
         
     except ValueError as e:
-        logger.error(f"SQL generation failed: {str(e)}")
+        logger.error("SQL generation failed: %s", e)
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        logger.error(f"Unexpected error in SQL generation: {str(e)}")
+        logger.error("Unexpected error in SQL generation: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error during SQL generation")
 
 
@@ -59,7 +197,6 @@ async def generation_health_check():
     """
     try:
         # Check if we have an active database connection
-        from ...services.database_service import database_service
         current_db = database_service.get_current_database()
         
         if current_db is None:
@@ -77,7 +214,7 @@ async def generation_health_check():
         }
         
     except Exception as e:
-        logger.error(f"Health check failed: {str(e)}")
+        logger.error("Health check failed: %s", e)
         return {
             "status": "error",
             "message": f"Service error: {str(e)}",
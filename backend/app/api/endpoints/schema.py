@@ -1,28 +1,94 @@
-from fastapi import APIRouter, HTTPException, Query
-from typing import Dict, Any, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.engine import Connection
+from typing import Dict, Any, Optional, Set
+from weakref import WeakValueDictionary
+import asyncio
 import logging
+import time
 
+from app.api.dependencies import get_db
+from app.services.cache_service import cache_service
 from app.services.schema_service import schema_service
 from app.models.schema import (
     SchemaResponse,
     TableResponse,
-    RelationshipsResponse
+    RelationshipsResponse,
+    SchemaSummaryResponse,
+    RelatedTablesResponse,
+    TableStatisticsResponse,
+    SchemaSearchResponse,
+    SchemaRefreshResponse
 )
+from app.utils.config import settings
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/schema", tags=["schema"])
 
+# The complete schema response is cached pre-encoded in cache_service (so
+# connect/disconnect/refresh drop it with the schema) and served
+# stale-while-revalidate. Locks only live while a fetch holds or awaits them.
+_schema_locks: "WeakValueDictionary[str, asyncio.Lock]" = WeakValueDictionary()
+_background_tasks: Set[asyncio.Task] = set()
 
-@router.get("/", response_model=Dict[str, Any])
+
+def _encode_schema_result(result: Dict[str, Any]) -> bytes:
+    return SchemaResponse.model_validate(result).model_dump_json().encode("utf-8")
+
+
+async def _fetch_schema(db_key: Optional[str], force_refresh: bool) -> Dict[str, Any]:
+    """Fetch the schema in a worker thread and update the response cache"""
+    result = await asyncio.to_thread(schema_service.get_complete_schema, force_refresh=force_refresh)
+    if result["success"] and db_key:
+        cache_service.set_schema_response(db_key, time.monotonic(), _encode_schema_result(result))
+    return result
+
+
+async def _refresh_schema(db_key: str):
+    """Background refresh of a stale entry; concurrent refreshes are deduplicated"""
+    lock = _schema_locks.setdefault(db_key, asyncio.Lock())
+    if lock.locked():
+        return
+    async with lock:
+        try:
+            await _fetch_schema(db_key, force_refresh=True)
+        except Exception as e:
+            logger.error("Background schema refresh failed: %s", e)
+
+
+def _schedule_refresh(db_key: str):
+    task = asyncio.create_task(_refresh_schema(db_key))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+@router.get("/", response_model=SchemaResponse)
 async def get_complete_schema(
     refresh: bool = Query(False, description="Force refresh of schema cache")
 ):
     """
     Get complete database schema information including all tables, columns, and relationships.
-    Results are cached for 30 minutes unless refresh=true.
+    Results are cached for 30 minutes unless refresh=true; stale responses are
+    served immediately while a background refresh runs.
     """
     try:
-        result = schema_service.get_complete_schema(force_refresh=refresh)
+        db_key = schema_service.current_database_key()
+        
+        if not refresh and db_key:
+            cached = cache_service.get_schema_response(db_key)
+            if cached is None:
+                # Cold miss: let one caller introspect, the rest wait for its result
+                async with _schema_locks.setdefault(db_key, asyncio.Lock()):
+                    cached = cache_service.get_schema_response(db_key)
+                    if cached is None:
+                        result = await _fetch_schema(db_key, force_refresh=False)
+            
+            if cached is not None:
+                fetched_at, body = cached
+                if time.monotonic() - fetched_at > settings.SCHEMA_RESPONSE_TTL_SECONDS:
+                    _schedule_refresh(db_key)
+                return Response(content=body, media_type="application/json")
+        else:
+            result = await _fetch_schema(db_key, force_refresh=refresh)
         
         if not result["success"]:
             raise HTTPException(
@@ -35,20 +101,20 @@ async def get_complete_schema(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Unexpected error in get_complete_schema: {str(e)}")
+        logger.error("Unexpected error in get_complete_schema: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Internal server error while getting schema"
         )
 
 
-@router.get("/summary", response_model=Dict[str, Any])
+@router.get("/summary", response_model=SchemaSummaryResponse)
 async def get_schema_summary():
     """
     Get a summary of the database schema including statistics and overview information.
     """
     try:
-        result = schema_service.get_schema_summary()
+        result = await asyncio.to_thread(schema_service.get_schema_summary)
         
         if not result["success"]:
             raise HTTPException(
@@ -61,7 +127,7 @@ async def get_schema_summary():
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Unexpected error in get_schema_summary: {str(e)}")
+        logger.error("Unexpected error in get_schema_summary: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Internal server error while getting schema summary"
@@ -74,7 +140,7 @@ async def get_table_schema(table_name: str):
     Get detailed schema information for a specific table.
     """
     try:
-        result = schema_service.get_table_schema(table_name)
+        result = await asyncio.to_thread(schema_service.get_table_schema, table_name)
         
         if not result["success"]:
             raise HTTPException(
@@ -87,7 +153,7 @@ async def get_table_schema(table_name: str):
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Unexpected error in get_table_schema: {str(e)}")
+        logger.error("Unexpected error in get_table_schema: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Internal server error while getting table schema"
@@ -103,7 +169,7 @@ async def get_relationships(
     Optionally filter by table name.
     """
     try:
-        result = schema_service.get_relationships(table_name)
+        result = await asyncio.to_thread(schema_service.get_relationships, table_name)
         
         if not result["success"]:
             raise HTTPException(
@@ -116,20 +182,20 @@ async def get_relationships(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Unexpected error in get_relationships: {str(e)}")
+        logger.error("Unexpected error in get_relationships: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Internal server error while getting relationships"
         )
 
 
-@router.get("/tables/{table_name}/related", response_model=Dict[str, Any])
+@router.get("/tables/{table_name}/related", response_model=RelatedTablesResponse)
 async def get_related_tables(table_name: str):
     """
     Get tables that are related to the specified table via foreign keys.
     """
     try:
-        result = schema_service.get_related_tables(table_name)
+        result = await asyncio.to_thread(schema_service.get_related_tables, table_name)
         
         if not result["success"]:
             raise HTTPException(
@@ -142,20 +208,20 @@ async def get_related_tables(table_name: str):
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Unexpected error in get_related_tables: {str(e)}")
+        logger.error("Unexpected error in get_related_tables: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Internal server error while getting related tables"
         )
 
 
-@router.get("/tables/{table_name}/statistics", response_model=Dict[str, Any])
-async def get_table_statistics(table_name: str):
+@router.get("/tables/{table_name}/statistics", response_model=TableStatisticsResponse)
+async def get_table_statistics(table_name: str, conn: Optional[Connection] = Depends(get_db)):
     """
     Get statistics for a specific table including row count, column types, etc.
     """
     try:
-        result = schema_service.get_table_statistics(table_name)
+        result = await asyncio.to_thread(schema_service.get_table_statistics, table_name, conn)
         
         if not result["success"]:
             raise HTTPException(
@@ -168,14 +234,14 @@ async def get_table_statistics(table_name: str):
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Unexpected error in get_table_statistics: {str(e)}")
+        logger.error("Unexpected error in get_table_statistics: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Internal server error while getting table statistics"
         )
 
 
-@router.get("/search", response_model=Dict[str, Any])
+@router.get("/search", response_model=SchemaSearchResponse)
 async def search_schema(
     query: str = Query(..., description="Search term for tables, columns, or relationships"),
     search_type: str = Query("all", description="Type of search: 'tables', 'columns', 'relationships', or 'all'")
@@ -184,7 +250,7 @@ async def search_schema(
     Search the database schema for tables, columns, or relationships matching the query.
     """
     try:
-        result = schema_service.search_schema(query, search_type)
+        result = await asyncio.to_thread(schema_service.search_schema, query, search_type)
         
         if not result["success"]:
             raise HTTPException(
@@ -197,21 +263,21 @@ async def search_schema(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Unexpected error in search_schema: {str(e)}")
+        logger.error("Unexpected error in search_schema: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Internal server error while searching schema"
         )
 
 
-@router.post("/refresh", response_model=Dict[str, Any])
+@router.post("/refresh", response_model=SchemaRefreshResponse)
 async def refresh_schema_cache():
     """
     Force refresh of the schema cache.
     Useful when database structure has changed.
     """
     try:
-        result = schema_service.refresh_schema_cache()
+        result = await asyncio.to_thread(schema_service.refresh_schema_cache)
         
         if not result["success"]:
             raise HTTPException(
@@ -224,7 +290,7 @@ async def refresh_schema_cache():
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Unexpected error in refresh_schema_cache: {str(e)}")
+        logger.error("Unexpected error in refresh_schema_cache: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Internal server error while refreshing schema cache"
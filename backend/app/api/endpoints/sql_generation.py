@@ -1,23 +0,0 @@
-# SQL generation endpoints
-from fastapi import APIRouter, HTTPException
-from typing import Dict, Any
-
-router = APIRouter(prefix="/sql", tags=["sql"])
-
-@router.post("/generate")
-async def generate_sql(query_request: Dict[str, Any]):
-    """Generate SQL from natural language query"""
-    try:
-        # TODO: Implement SQL generation logic with LangChain
-        return {"sql": "SELECT * FROM table", "explanation": "Generated SQL query"}
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
-
-@router.post("/validate")
-async def validate_sql(sql_query: str):
-    """Validate generated SQL query"""
-    try:
-        # TODO: Implement SQL validation logic
-        return {"valid": True, "message": "SQL query is valid"}
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e)) 
\ No newline at end of file
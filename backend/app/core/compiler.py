@@ -0,0 +1,212 @@
+"""
+Deterministic compiler from the JSON query AST requested by AST_SYSTEM_PROMPT to SQL.
+
+AST shape:
+    {"type": "select", "distinct": bool,
+     "select": [{"expr": <operand>, "agg": "COUNT"|..., "alias": str}],
+     "from": {"table": str, "alias": str},
+     "joins": [{"type": "INNER"|"LEFT"|..., "table": str, "alias": str, "on": <condition>}],
+     "where": <condition>, "group_by": [<operand>], "having": <condition>,
+     "order_by": [{"expr": <operand>, "dir": "ASC"|"DESC"}], "limit": int}
+
+Operands are column references ("alias.column" or "*"), literals ({"value": ...})
+or function calls ({"func": "LOWER", "args": [<operand>]}).
+Conditions are comparisons ({"left": <operand>, "op": "=", "right": <operand>})
+or boolean combinations ({"op": "AND"|"OR", "args": [...]}, {"op": "NOT", "arg": ...}).
+"""
+from __future__ import annotations
+import hashlib
+import json
+import math
+import re
+from threading import Lock
+from typing import Any, Dict, List, Tuple
+
+_IDENT_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+_QUOTE_CHARS = {"mysql": "`", "mssql": '"', "sqlite": '"', "postgresql": '"'}
+
+_AGGREGATES = {"COUNT", "SUM", "AVG", "MIN", "MAX"}
+_FUNCTIONS = _AGGREGATES | {"LOWER", "UPPER", "LENGTH", "ABS", "ROUND", "COALESCE", "DATE", "STRFTIME", "SUBSTR"}
+_COMPARISONS = {"=", "!=", "<>", "<", "<=", ">", ">=", "LIKE", "NOT LIKE", "IN", "NOT IN", "BETWEEN"}
+_NULL_CHECKS = {"IS NULL", "IS NOT NULL"}
+_JOIN_TYPES = {"INNER", "LEFT", "RIGHT", "FULL", "CROSS"}
+
+_COMPILED_CACHE_SIZE = 1024
+_compiled: Dict[Tuple[str, str], str] = {}
+_compiled_lock = Lock()
+
+
+class _Compiler:
+    def __init__(self, dialect: str):
+        self.dialect = dialect
+        self.quote_char = _QUOTE_CHARS.get(dialect, '"')
+
+    def ident(self, name: str) -> str:
+        if not isinstance(name, str) or not name:
+            raise ValueError(f"Invalid identifier: {name!r}")
+        if _IDENT_RE.match(name):
+            return name
+        q = self.quote_char
+        return f"{q}{name.replace(q, q + q)}{q}"
+
+    def column(self, ref: str) -> str:
+        if ref == "*":
+            return ref
+        parts = ref.split(".")
+        if len(parts) > 2:
+            raise ValueError(f"Invalid column reference: {ref!r}")
+        if parts[-1] == "*":
+            return f"{self.ident(parts[0])}.*"
+        return ".".join(self.ident(p) for p in parts)
+
+    def literal(self, value: Any) -> str:
+        if value is None:
+            return "NULL"
+        if isinstance(value, bool):
+            if self.dialect == "sqlite":
+                return "1" if value else "0"
+            return "TRUE" if value else "FALSE"
+        if isinstance(value, float) and not math.isfinite(value):
+            raise ValueError(f"Unsupported literal: {value!r}")
+        if isinstance(value, (int, float)):
+            return repr(value)
+        if isinstance(value, str):
+            return "'" + value.replace("'", "''") + "'"
+        if isinstance(value, list):
+            return "(" + ", ".join(self.literal(v) for v in value) + ")"
+        raise ValueError(f"Unsupported literal: {value!r}")
+
+    def operand(self, node: Any) -> str:
+        if isinstance(node, str):
+            return self.column(node)
+        if isinstance(node, (int, float)) and not isinstance(node, bool):
+            return self.literal(node)
+        if isinstance(node, dict):
+            if "value" in node:
+                return self.literal(node["value"])
+            if "func" in node:
+                func = str(node["func"]).upper()
+                if func not in _FUNCTIONS:
+                    raise ValueError(f"Unsupported function: {func}")
+                args = ", ".join(self.operand(a) for a in node.get("args", []))
+                return f"{func}({args})"
+        raise ValueError(f"Invalid operand: {node!r}")
+
+    def condition(self, node: Dict[str, Any]) -> str:
+        if not isinstance(node, dict) or "op" not in node:
+            raise ValueError(f"Invalid condition: {node!r}")
+        op = str(node["op"]).upper()
+
+        if op in ("AND", "OR"):
+            args = node.get("args") or []
+            if not args:
+                raise ValueError(f"{op} requires arguments")
+            return "(" + f" {op} ".join(self.condition(a) for a in args) + ")"
+        if op == "NOT":
+            return f"NOT ({self.condition(node['arg'])})"
+
+        left = self.operand(node["left"])
+        if op in _NULL_CHECKS:
+            return f"{left} {op}"
+        if op not in _COMPARISONS:
+            raise ValueError(f"Unsupported operator: {op}")
+        if op == "BETWEEN":
+            low, high = node["right"]
+            return f"{left} BETWEEN {self.operand(low)} AND {self.operand(high)}"
+        return f"{left} {op} {self.operand(node['right'])}"
+
+    def select_item(self, item: Any) -> str:
+        if isinstance(item, str):
+            return self.column(item)
+        expr = self.operand(item.get("expr", "*"))
+        agg = item.get("agg")
+        if agg:
+            agg = str(agg).upper()
+            if agg not in _AGGREGATES:
+                raise ValueError(f"Unsupported aggregate: {agg}")
+            distinct = "DISTINCT " if item.get("distinct") else ""
+            expr = f"{agg}({distinct}{expr})"
+        alias = item.get("alias")
+        return f"{expr} AS {self.ident(alias)}" if alias else expr
+
+    def table_ref(self, node: Dict[str, Any]) -> str:
+        table = self.ident(node["table"])
+        alias = node.get("alias")
+        return f"{table} {self.ident(alias)}" if alias else table
+
+    def compile(self, ast: Dict[str, Any]) -> str:
+        if str(ast.get("type", "select")).lower() != "select":
+            raise ValueError("Only select queries are supported")
+        if not ast.get("select") or not ast.get("from"):
+            raise ValueError("Query requires select and from")
+
+        limit = ast.get("limit")
+        if limit is not None and (not isinstance(limit, int) or isinstance(limit, bool) or limit < 0):
+            raise ValueError(f"Invalid limit: {limit!r}")
+
+        parts: List[str] = ["SELECT"]
+        if ast.get("distinct"):
+            parts.append("DISTINCT")
+        if limit is not None and self.dialect == "mssql":
+            parts.append(f"TOP {limit}")
+        parts.append(", ".join(self.select_item(i) for i in ast["select"]))
+        parts.append("FROM " + self.table_ref(ast["from"]))
+
+        for join in ast.get("joins") or []:
+            join_type = str(join.get("type", "INNER")).upper()
+            if join_type not in _JOIN_TYPES:
+                raise ValueError(f"Unsupported join type: {join_type}")
+            clause = f"{join_type} JOIN {self.table_ref(join)}"
+            if join_type != "CROSS":
+                clause += " ON " + self.condition(join["on"])
+            parts.append(clause)
+
+        if ast.get("where"):
+            parts.append("WHERE " + self.condition(ast["where"]))
+        if ast.get("group_by"):
+            parts.append("GROUP BY " + ", ".join(self.operand(g) for g in ast["group_by"]))
+        if ast.get("having"):
+            parts.append("HAVING " + self.condition(ast["having"]))
+        if ast.get("order_by"):
+            items = []
+            for o in ast["order_by"]:
+                if isinstance(o, str):
+                    items.append(self.column(o))
+                    continue
+                direction = str(o.get("dir", "ASC")).upper()
+                if direction not in ("ASC", "DESC"):
+                    raise ValueError(f"Invalid sort direction: {direction}")
+                items.append(f"{self.operand(o['expr'])} {direction}")
+            parts.append("ORDER BY " + ", ".join(items))
+        if limit is not None and self.dialect != "mssql":
+            parts.append(f"LIMIT {limit}")
+
+        return " ".join(parts)
+
+
+def compile_ast(ast: Dict[str, Any], dialect: str) -> str:
+    """
+    Compile a query AST to SQL for the given dialect.
+    Results are cached by (dialect, canonical AST hash).
+    Raises ValueError for malformed or unsupported ASTs.
+    """
+    if not isinstance(ast, dict):
+        raise ValueError("Query AST must be a JSON object")
+
+    canonical = json.dumps(ast, sort_keys=True, separators=(",", ":"))
+    key = (dialect, hashlib.blake2b(canonical.encode("utf-8"), digest_size=16, usedforsecurity=False).hexdigest())
+
+    sql = _compiled.get(key)
+    if sql is not None:
+        return sql
+
+    try:
+        sql = _Compiler(dialect).compile(ast)
+    except (KeyError, TypeError, AttributeError) as e:
+        raise ValueError(f"Malformed query AST: {str(e)}")
+
+    with _compiled_lock:
+        if len(_compiled) >= _COMPILED_CACHE_SIZE:
+            _compiled.pop(next(iter(_compiled)))
+        _compiled[key] = sql
+    return sql
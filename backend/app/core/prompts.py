@@ -1,5 +1,6 @@
 from __future__ import annotations
 from textwrap import dedent
+from typing import List
 
 SYSTEM_PROMPT = dedent("""
 You are a senior SQL engineer.
@@ -16,8 +17,54 @@ OUTPUT:
 - A single SQL statement as plain text.
 """).strip()
 
+# Compile-style generation: the model emits a JSON query AST that
+# app.core.compiler renders into dialect-specific SQL.
+_AST_RULES = dedent("""
+- Only read queries (type "select") are allowed.
+- Use only tables/columns that exist in the provided schema context.
+- Reference columns as "alias.column"; give every table an alias.
+- When joining, use foreign-key relationships if provided.
+- Omit keys that are not needed.
+""").strip()
+
+_AST_FORMAT = dedent("""
+{"type": "select", "distinct": false,
+ "select": [{"expr": "c.Country", "alias": "country"}, {"agg": "COUNT", "expr": "*", "alias": "n"}],
+ "from": {"table": "Customer", "alias": "c"},
+ "joins": [{"type": "INNER", "table": "Invoice", "alias": "i",
+            "on": {"left": "c.CustomerId", "op": "=", "right": "i.CustomerId"}}],
+ "where": {"op": "AND", "args": [{"left": "i.Total", "op": ">", "right": {"value": 10}},
+                                 {"left": "c.Country", "op": "IN", "right": {"value": ["USA", "Canada"]}}]},
+ "group_by": ["c.Country"],
+ "having": {"left": {"func": "COUNT", "args": ["*"]}, "op": ">=", "right": {"value": 2}},
+ "order_by": [{"expr": "n", "dir": "DESC"}],
+ "limit": 10}
+
+- Literals are always wrapped as {"value": ...}; bare strings are column references.
+- Comparison ops: =, !=, <, <=, >, >=, LIKE, NOT LIKE, IN, NOT IN, BETWEEN (right is [low, high]), IS NULL, IS NOT NULL.
+- Boolean ops: {"op": "AND"|"OR", "args": [...]}, {"op": "NOT", "arg": ...}.
+""").strip()
+
+AST_SYSTEM_PROMPT = f"""You are a senior SQL engineer. Translate the task into a JSON query AST.
+
+RULES:
+- Return ONLY one JSON object. No markdown, no code fences, no comments, no explanations.
+{_AST_RULES}
+
+FORMAT:
+{_AST_FORMAT}"""
+
+# Several tasks answered in one call, one query object per task
+AST_BATCH_SYSTEM_PROMPT = f"""You are a senior SQL engineer. Translate each numbered task into a JSON query AST.
+
+RULES:
+- Return ONLY a JSON array with one query object per task, in task order. No markdown, no code fences, no comments, no explanations.
+{_AST_RULES}
 
-def make_user_prompt(dialect: str, task: str, schema_snippet: str, examples: str | None = None) -> str:
+FORMAT (one array element):
+{_AST_FORMAT}"""
+
+def make_user_prompt(dialect: str, task: str, schema_snippet: str, examples: str | None = None, ast: bool = False) -> str:
     base = f"""DIALECT: {dialect}
 
 TASK:
@@ -28,5 +75,24 @@ SCHEMA CONTEXT (tables, columns, relationships):
 """
     if examples:
         base += f"\nEXAMPLES ({dialect}):\n{examples}\n"
-    base += "\nRemember: output ONLY the SQL statement, nothing else."
-    return base 
\ No newline at end of file
+    if ast:
+        base += "\nRemember: output ONLY the JSON query object, nothing else."
+    else:
+        base += "\nRemember: output ONLY the SQL statement, nothing else."
+    return base
+
+
+def make_batch_user_prompt(dialect: str, tasks: List[str], schema_snippet: str, examples: str | None = None) -> str:
+    numbered = "\n".join(f"{i}. {task}" for i, task in enumerate(tasks, 1))
+    base = f"""DIALECT: {dialect}
+
+TASKS:
+{numbered}
+
+SCHEMA CONTEXT (tables, columns, relationships):
+{schema_snippet}
+"""
+    if examples:
+        base += f"\nEXAMPLES ({dialect}):\n{examples}\n"
+    base += f"\nRemember: output ONLY a JSON array of {len(tasks)} query objects, nothing else."
+    return base
@@ -0,0 +1,102 @@
+"""
+Guards for generated SQL.
+
+is_mutating() rejects DDL/DML keywords outside string literals and comments.
+With hyperscan installed the keyword set is matched by a compiled DFA; otherwise
+a single precompiled alternation regex is used (no nested quantifiers, so
+matching stays linear in the input length).
+validate_sql() additionally parses the statement with sqlglot when available.
+"""
+from __future__ import annotations
+import re
+from typing import Union
+
+try:
+    import hyperscan
+except ImportError:  # optional, falls back to re
+    hyperscan = None
+
+try:
+    import sqlglot
+    from sqlglot import exp
+    from sqlglot.errors import SqlglotError
+except ImportError:  # structural validation is skipped without sqlglot
+    sqlglot = None
+
+MUTATING_KEYWORDS = (
+    "CREATE", "ALTER", "INSERT", "UPDATE", "DELETE", "TRUNCATE", "DROP",
+    "MERGE", "GRANT", "REVOKE", "ATTACH", "DETACH",
+)
+
+# String literals and comments; unterminated ones run to the end of the input
+_LITERALS_RE = re.compile(
+    rb"'[^']*(?:''[^']*)*'?|--[^\n]*|/\*.*?(?:\*/|\Z)",
+    re.DOTALL
+)
+_KEYWORDS_RE = re.compile(
+    rb"\b(?:" + b"|".join(k.encode("ascii") for k in MUTATING_KEYWORDS) + rb")\b",
+    re.IGNORECASE
+)
+
+# sqlalchemy dialect name -> sqlglot dialect name
+_SQLGLOT_DIALECTS = {"postgresql": "postgres", "mssql": "tsql"}
+
+
+def _build_hyperscan_db():
+    if hyperscan is None:
+        return None
+    db = hyperscan.Database()
+    db.compile(
+        expressions=[rb"\b" + k.encode("ascii") + rb"\b" for k in MUTATING_KEYWORDS],
+        ids=list(range(len(MUTATING_KEYWORDS))),
+        elements=len(MUTATING_KEYWORDS),
+        flags=[hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH] * len(MUTATING_KEYWORDS)
+    )
+    return db
+
+
+_HS_DB = _build_hyperscan_db()
+
+
+def _on_match(id, start, end, flags, context):
+    context.append(id)
+    return True  # stop scanning at the first keyword
+
+
+def is_mutating(sql: Union[str, bytes]) -> bool:
+    """Check whether SQL contains a DDL/DML keyword outside literals and comments"""
+    data = sql.encode("utf-8") if isinstance(sql, str) else sql
+    data = _LITERALS_RE.sub(b" ", data)
+
+    if _HS_DB is not None:
+        matches: list = []
+        try:
+            _HS_DB.scan(data, match_event_handler=_on_match, context=matches)
+        except hyperscan.ScanTerminated:
+            pass
+        return bool(matches)
+    return _KEYWORDS_RE.search(data) is not None
+
+
+def validate_sql(sql: str, dialect: str) -> None:
+    """
+    Validate generated SQL: a single, parseable, read-only statement.
+    Raises ValueError describing the first problem found.
+    """
+    if not sql.strip():
+        raise ValueError("Generated SQL is empty")
+    if is_mutating(sql):
+        raise ValueError("Generated SQL contains data-modifying statements")
+    if sqlglot is None:
+        return
+
+    try:
+        statements = sqlglot.parse(sql, read=_SQLGLOT_DIALECTS.get(dialect, dialect))
+    except SqlglotError as e:
+        raise ValueError(f"Generated SQL is invalid: {str(e).splitlines()[0]}")
+
+    statements = [s for s in statements if s is not None]
+    if len(statements) != 1:
+        raise ValueError("Generated SQL must be a single statement")
+    if not isinstance(statements[0], exp.Query):
+        raise ValueError("Generated SQL must be a read query")
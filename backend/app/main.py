@@ -1,19 +1,43 @@
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.utils.config import settings
-from app.api.endpoints import database
+from app.utils.graph_kernels import warmup as warmup_graph_kernels
+from app.api.endpoints import database, schema, generation
+from contextlib import asynccontextmanager
+import asyncio
+import atexit
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
 
-# Configure logging
+# Configure logging: request handlers only enqueue records, a background
+# listener thread formats and writes them
+log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+_console_handler = logging.StreamHandler()
+_console_handler.setFormatter(logging.Formatter("{asctime} - {name} - {levelname} - {message}", style="{"))
+_queue_handler = QueueHandler(log_queue)
+_queue_handler.setFormatter(logging.Formatter("{message}", style="{"))
 logging.basicConfig(
     level=getattr(logging, settings.LOG_LEVEL.upper()),
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    handlers=[_queue_handler]
 )
+log_listener = QueueListener(log_queue, _console_handler, respect_handler_level=True)
+log_listener.start()
+atexit.register(log_listener.stop)
+
+# JIT-compile the join path kernels before serving, not on first import or request
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await asyncio.to_thread(warmup_graph_kernels)
+    yield
 
 app = FastAPI(
     title="SQL Generator API",
     description="AI-powered SQL query generation from natural language",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -26,7 +50,8 @@ app.add_middleware(
 )
 
 # Include routers
-app.include_router(database.router, prefix="/api/v1")
+for r in (database.router, schema.router, generation.router):
+    app.include_router(r, prefix="/api/v1")
 
 @app.get("/")
 async def root():
@@ -36,6 +61,8 @@ async def root():
         "endpoints": {
             "health": "/health",
             "database": "/api/v1/database",
+            "schema": "/api/v1/schema",
+            "generate": "/api/v1/generate",
             "docs": "/docs"
         }
     }
@@ -46,4 +73,11 @@ async def health_check():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=settings.API_PORT) 
\ No newline at end of file
+    # Single worker: the active connection and all caches are per-process state
+    uvicorn.run(
+        "app.main:app",
+        host="0.0.0.0",
+        port=settings.API_PORT,
+        loop="uvloop",
+        http="httptools"
+    )
@@ -0,0 +1,166 @@
+"""
+OpenAPI example payloads for the pydantic models.
+
+Models reference their example by name through openapi_example(); the payloads
+are only built the first time a JSON schema is generated (i.e. when the docs
+are requested), not when the model modules are imported.
+"""
+from functools import lru_cache
+from typing import Any, Callable, Dict
+
+
+@lru_cache(maxsize=1)
+def _examples() -> Dict[str, Dict[str, Any]]:
+    return {
+        # Schema models
+        "ColumnInfo": {
+            "name": "CustomerId",
+            "type": "INTEGER",
+            "type_category": "INTEGER",
+            "nullable": False,
+            "primary_key": True,
+            "foreign_key": None,
+            "default_value": None,
+            "max_length": None,
+            "auto_increment": True
+        },
+        "ForeignKeyRelation": {
+            "from_table": "Invoice",
+            "from_column": "CustomerId",
+            "to_table": "Customer", 
+            "to_column": "CustomerId",
+            "constraint_name": "FK_InvoiceCustomerId"
+        },
+        "TableInfo": {
+            "name": "Customer",
+            "columns": [
+                {
+                    "name": "CustomerId",
+                    "type": "INTEGER",
+                    "nullable": False,
+                    "primary_key": True
+                }
+            ],
+            "primary_keys": ["CustomerId"],
+            "foreign_keys": [],
+            "row_count": 59
+        },
+        "DatabaseSchema": {
+            "database_name": "chinook",
+            "database_type": "sqlite",
+            "tables": [],
+            "relationships": [],
+            "total_tables": 11,
+            "schema_version": "1.0",
+            "extracted_at": "2024-01-01T12:00:00Z"
+        },
+        # Relationship models
+        "JoinPathStep": {
+            "from_table": "Invoice",
+            "from_column": "CustomerId",
+            "to_table": "Customer",
+            "to_column": "CustomerId",
+            "join_type": "INNER",
+            "relationship_type": "many_to_one",
+            "constraint_name": "FK_InvoiceCustomerId"
+        },
+        "JoinPath": {
+            "start_table": "Invoice",
+            "end_table": "Customer",
+            "steps": [
+                {
+                    "from_table": "Invoice",
+                    "from_column": "CustomerId",
+                    "to_table": "Customer",
+                    "to_column": "CustomerId",
+                    "join_type": "INNER"
+                }
+            ],
+            "total_steps": 1,
+            "confidence": 1.0
+        },
+        "RelationshipAnalysis": {
+            "from_table": "Invoice",
+            "from_column": "CustomerId",
+            "to_table": "Customer",
+            "to_column": "CustomerId",
+            "relationship_type": "many_to_one",
+            "strength": "strong",
+            "referential_integrity": 0.95,
+            "sample_data": {
+                "total_invoices": 1000,
+                "unique_customers": 59,
+                "avg_invoices_per_customer": 16.95
+            }
+        },
+        "RelationshipGraph": {
+            "nodes": [
+                {"id": "Customer", "type": "table", "row_count": 59},
+                {"id": "Invoice", "type": "table", "row_count": 1000}
+            ],
+            "edges": [
+                {
+                    "from": "Invoice",
+                    "to": "Customer",
+                    "type": "many_to_one",
+                    "strength": "strong"
+                }
+            ],
+            "metadata": {
+                "total_tables": 11,
+                "total_relationships": 8,
+                "graph_type": "directed"
+            }
+        },
+        "JoinPathRequest": {
+            "start_table": "Invoice",
+            "end_table": "Customer",
+            "max_steps": 3,
+            "prefer_direct": True
+        },
+        "RelationshipAnalysisRequest": {
+            "table_name": "Invoice",
+            "include_sample_data": True,
+            "analyze_integrity": True
+        },
+        # Response models
+        "DatabaseConnectionResponse": {
+            "success": True,
+            "error": None,
+            "connection_info": {
+                "database_type": "sqlite",
+                "database_path": "chinook.db",
+                "dialect": "sqlite",
+                "tables_count": 11
+            }
+        },
+        "TablesResponse": {
+            "success": True,
+            "error": None,
+            "tables": ["Album", "Artist", "Customer", "Employee", "Genre", "Invoice"]
+        },
+        "TestConnectionResponse": {
+            "success": True,
+            "error": None
+        },
+        # Request models
+        "DatabaseConnectionRequest": {
+            "database_path": "/path/to/your/database.db"
+        },
+        "SQLGenerationRequest": {
+            "query": "Show me all customers who made purchases in the last month",
+            "examples": [
+                {
+                    "query": "Get all customers",
+                    "sql": "SELECT * FROM Customer"
+                }
+            ]
+        },
+    }
+
+
+def openapi_example(name: str) -> Callable[[Dict[str, Any]], None]:
+    """json_schema_extra hook that adds the named example to a model's schema"""
+    def add_example(schema: Dict[str, Any]) -> None:
+        schema["example"] = _examples()[name]
+    return add_example
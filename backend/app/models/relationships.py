@@ -1,7 +1,9 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Dict, Optional, Any
 from enum import Enum
 
+from .examples import openapi_example
+
 
 class RelationshipType(str, Enum):
     """Types of database relationships"""
@@ -38,18 +40,10 @@ class JoinPathStep(BaseModel):
     relationship_type: RelationshipType = Field(default=RelationshipType.UNKNOWN, description="Type of relationship")
     constraint_name: Optional[str] = Field(default=None, description="Foreign key constraint name")
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "from_table": "Invoice",
-                "from_column": "CustomerId",
-                "to_table": "Customer",
-                "to_column": "CustomerId",
-                "join_type": "INNER",
-                "relationship_type": "many_to_one",
-                "constraint_name": "FK_InvoiceCustomerId"
-            }
-        }
+    model_config = ConfigDict(
+        defer_build=True,
+        json_schema_extra=openapi_example("JoinPathStep")
+    )
 
 
 class JoinPath(BaseModel):
@@ -73,24 +67,10 @@ class JoinPath(BaseModel):
             return []
         return [step.to_table for step in self.steps[:-1]]
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "start_table": "Invoice",
-                "end_table": "Customer",
-                "steps": [
-                    {
-                        "from_table": "Invoice",
-                        "from_column": "CustomerId",
-                        "to_table": "Customer",
-                        "to_column": "CustomerId",
-                        "join_type": "INNER"
-                    }
-                ],
-                "total_steps": 1,
-                "confidence": 1.0
-            }
-        }
+    model_config = ConfigDict(
+        defer_build=True,
+        json_schema_extra=openapi_example("JoinPath")
+    )
 
 
 class RelationshipAnalysis(BaseModel):
@@ -105,23 +85,10 @@ class RelationshipAnalysis(BaseModel):
     sample_data: Optional[Dict[str, Any]] = Field(default=None, description="Sample data from the relationship")
     constraint_info: Optional[Dict[str, Any]] = Field(default=None, description="Constraint information")
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "from_table": "Invoice",
-                "from_column": "CustomerId",
-                "to_table": "Customer",
-                "to_column": "CustomerId",
-                "relationship_type": "many_to_one",
-                "strength": "strong",
-                "referential_integrity": 0.95,
-                "sample_data": {
-                    "total_invoices": 1000,
-                    "unique_customers": 59,
-                    "avg_invoices_per_customer": 16.95
-                }
-            }
-        }
+    model_config = ConfigDict(
+        defer_build=True,
+        json_schema_extra=openapi_example("RelationshipAnalysis")
+    )
 
 
 class RelationshipGraph(BaseModel):
@@ -130,28 +97,10 @@ class RelationshipGraph(BaseModel):
     edges: List[Dict[str, Any]] = Field(..., description="Relationship edges")
     metadata: Dict[str, Any] = Field(default_factory=dict, description="Graph metadata")
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "nodes": [
-                    {"id": "Customer", "type": "table", "row_count": 59},
-                    {"id": "Invoice", "type": "table", "row_count": 1000}
-                ],
-                "edges": [
-                    {
-                        "from": "Invoice",
-                        "to": "Customer",
-                        "type": "many_to_one",
-                        "strength": "strong"
-                    }
-                ],
-                "metadata": {
-                    "total_tables": 11,
-                    "total_relationships": 8,
-                    "graph_type": "directed"
-                }
-            }
-        }
+    model_config = ConfigDict(
+        defer_build=True,
+        json_schema_extra=openapi_example("RelationshipGraph")
+    )
 
 
 # Request models
@@ -162,15 +111,10 @@ class JoinPathRequest(BaseModel):
     max_steps: int = Field(default=3, description="Maximum number of join steps")
     prefer_direct: bool = Field(default=True, description="Prefer direct relationships")
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "start_table": "Invoice",
-                "end_table": "Customer",
-                "max_steps": 3,
-                "prefer_direct": True
-            }
-        }
+    model_config = ConfigDict(
+        defer_build=True,
+        json_schema_extra=openapi_example("JoinPathRequest")
+    )
 
 
 class RelationshipAnalysisRequest(BaseModel):
@@ -179,19 +123,17 @@ class RelationshipAnalysisRequest(BaseModel):
     include_sample_data: bool = Field(default=True, description="Include sample data in analysis")
     analyze_integrity: bool = Field(default=True, description="Analyze referential integrity")
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "table_name": "Invoice",
-                "include_sample_data": True,
-                "analyze_integrity": True
-            }
-        }
+    model_config = ConfigDict(
+        defer_build=True,
+        json_schema_extra=openapi_example("RelationshipAnalysisRequest")
+    )
 
 
 # Response models
 class JoinPathResponse(BaseModel):
     """Response model for join path results"""
+    model_config = ConfigDict(defer_build=True)
+    
     success: bool
     error: Optional[str] = None
     paths: List[JoinPath] = Field(default_factory=list)
@@ -201,6 +143,8 @@ class JoinPathResponse(BaseModel):
 
 class RelationshipAnalysisResponse(BaseModel):
     """Response model for relationship analysis"""
+    model_config = ConfigDict(defer_build=True)
+    
     success: bool
     error: Optional[str] = None
     table_name: str
@@ -210,6 +154,8 @@ class RelationshipAnalysisResponse(BaseModel):
 
 class RelationshipGraphResponse(BaseModel):
     """Response model for relationship graph"""
+    model_config = ConfigDict(defer_build=True)
+    
     success: bool
     error: Optional[str] = None
     graph: Optional[RelationshipGraph] = None
@@ -218,6 +164,8 @@ class RelationshipGraphResponse(BaseModel):
 
 class RelationshipStatisticsResponse(BaseModel):
     """Response model for relationship statistics"""
+    model_config = ConfigDict(defer_build=True)
+    
     success: bool
     error: Optional[str] = None
     statistics: Dict[str, Any] = Field(default_factory=dict)
@@ -1,18 +1,17 @@
 from __future__ import annotations
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, Dict, Any, List
 
+from .examples import openapi_example
+
 
 class DatabaseConnectionRequest(BaseModel):
     """Request model for custom database connection"""
     database_path: str = Field(..., description="Path to SQLite database file")
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "database_path": "/path/to/your/database.db"
-            }
-        }
+    model_config = ConfigDict(
+        json_schema_extra=openapi_example("DatabaseConnectionRequest")
+    )
 
 
 class SQLGenerationRequest(BaseModel):
@@ -20,18 +19,9 @@ class SQLGenerationRequest(BaseModel):
     query: str = Field(..., description="Natural language query to convert to SQL")
     examples: Optional[List[Dict[str, str]]] = Field(default=None, description="Optional example queries for context")
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "query": "Show me all customers who made purchases in the last month",
-                "examples": [
-                    {
-                        "query": "Get all customers",
-                        "sql": "SELECT * FROM Customer"
-                    }
-                ]
-            }
-        }
+    model_config = ConfigDict(
+        json_schema_extra=openapi_example("SQLGenerationRequest")
+    )
 
 
 class SQLValidationRequest(BaseModel):
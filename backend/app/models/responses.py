@@ -1,10 +1,14 @@
 # Pydantic response models
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 
+from .examples import openapi_example
+
 class ConnectionInfo(BaseModel):
     """Database connection information"""
+    model_config = ConfigDict(defer_build=True)
+    
     database_type: str
     database_path: str
     dialect: str
@@ -16,22 +20,15 @@ class DatabaseConnectionResponse(BaseModel):
     error: Optional[str] = None
     connection_info: Optional[ConnectionInfo] = None
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "success": True,
-                "error": None,
-                "connection_info": {
-                    "database_type": "sqlite",
-                    "database_path": "chinook.db",
-                    "dialect": "sqlite",
-                    "tables_count": 11
-                }
-            }
-        }
+    model_config = ConfigDict(
+        defer_build=True,
+        json_schema_extra=openapi_example("DatabaseConnectionResponse")
+    )
 
 class ConnectionStatusResponse(BaseModel):
     """Response model for connection status"""
+    model_config = ConfigDict(defer_build=True)
+    
     connected: bool
     connection_info: Optional[ConnectionInfo] = None
 
@@ -41,40 +38,61 @@ class TablesResponse(BaseModel):
     error: Optional[str] = None
     tables: List[str] = []
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "success": True,
-                "error": None,
-                "tables": ["Album", "Artist", "Customer", "Employee", "Genre", "Invoice"]
-            }
-        }
+    model_config = ConfigDict(
+        defer_build=True,
+        json_schema_extra=openapi_example("TablesResponse")
+    )
 
 class TestConnectionResponse(BaseModel):
     """Response model for connection test"""
     success: bool
     error: Optional[str] = None
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "success": True,
-                "error": None
-            }
-        }
+    model_config = ConfigDict(
+        defer_build=True,
+        json_schema_extra=openapi_example("TestConnectionResponse")
+    )
+
+class DisconnectResponse(BaseModel):
+    """Response model for database disconnect"""
+    model_config = ConfigDict(defer_build=True)
+    
+    message: str
 
 class SQLGenerationResponse(BaseModel):
+    model_config = ConfigDict(defer_build=True)
+    
     sql: str
     explanation: str
     confidence: float
     execution_time: float
 
+class BatchSQLGenerationItem(BaseModel):
+    """Result for one query of a batch"""
+    model_config = ConfigDict(defer_build=True)
+    
+    success: bool
+    error: Optional[str] = None
+    response: Optional[SQLGenerationResponse] = None
+
+class BatchSQLGenerationResponse(BaseModel):
+    """Response model for batch SQL generation, results in request order"""
+    model_config = ConfigDict(defer_build=True)
+    
+    results: List[BatchSQLGenerationItem]
+    cache_hits: int
+    llm_calls: int
+
 class TableSchemaResponse(BaseModel):
+    model_config = ConfigDict(defer_build=True)
+    
     table_name: str
     columns: List[Dict[str, Any]]
     primary_keys: List[str]
     foreign_keys: List[Dict[str, Any]]
 
 class ErrorResponse(BaseModel):
+    model_config = ConfigDict(defer_build=True)
+    
     error: str
     detail: Optional[str] = None 
\ No newline at end of file
@@ -1,7 +1,12 @@
-from pydantic import BaseModel, Field
-from typing import List, Dict, Optional, Any
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, model_validator
+from typing import List, Dict, Optional, Any, Set, FrozenSet, Tuple
+from array import array
+from collections import defaultdict
+from dataclasses import dataclass
 from enum import Enum
 
+from .examples import openapi_example
+
 
 class ColumnType(str, Enum):
     """Common column types"""
@@ -32,20 +37,10 @@ class ColumnInfo(BaseModel):
     max_length: Optional[int] = Field(default=None, description="Maximum length for string types")
     auto_increment: bool = Field(default=False, description="Whether column auto increments")
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "name": "CustomerId",
-                "type": "INTEGER",
-                "type_category": "INTEGER",
-                "nullable": False,
-                "primary_key": True,
-                "foreign_key": None,
-                "default_value": None,
-                "max_length": None,
-                "auto_increment": True
-            }
-        }
+    model_config = ConfigDict(
+        defer_build=True,
+        json_schema_extra=openapi_example("ColumnInfo")
+    )
 
 
 class ForeignKeyRelation(BaseModel):
@@ -56,16 +51,10 @@ class ForeignKeyRelation(BaseModel):
     to_column: str = Field(..., description="Target column name")
     constraint_name: Optional[str] = Field(default=None, description="FK constraint name")
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "from_table": "Invoice",
-                "from_column": "CustomerId",
-                "to_table": "Customer", 
-                "to_column": "CustomerId",
-                "constraint_name": "FK_InvoiceCustomerId"
-            }
-        }
+    model_config = ConfigDict(
+        defer_build=True,
+        json_schema_extra=openapi_example("ForeignKeyRelation")
+    )
 
 
 class TableInfo(BaseModel):
@@ -77,38 +66,69 @@ class TableInfo(BaseModel):
     row_count: Optional[int] = Field(default=None, description="Approximate number of rows")
     table_comment: Optional[str] = Field(default=None, description="Table description/comment")
     
+    # Column name lists, computed once after validation
+    _column_names: List[str] = PrivateAttr(default_factory=list)
+    _nullable_columns: List[str] = PrivateAttr(default_factory=list)
+    _required_columns: List[str] = PrivateAttr(default_factory=list)
+    # Retrieval keyword tokens and their norm, filled on first use by app.utils.retrieval
+    _keyword_tokens: Optional[Tuple[FrozenSet[str], float]] = PrivateAttr(default=None)
+    
+    @model_validator(mode="after")
+    def _index_columns(self) -> "TableInfo":
+        self._column_names = [col.name for col in self.columns]
+        self._nullable_columns = [col.name for col in self.columns if col.nullable]
+        self._required_columns = [col.name for col in self.columns if not col.nullable]
+        return self
+    
     @property
     def column_names(self) -> List[str]:
         """Get list of column names"""
-        return [col.name for col in self.columns]
+        return self._column_names
     
     @property
     def nullable_columns(self) -> List[str]:
         """Get list of nullable column names"""
-        return [col.name for col in self.columns if col.nullable]
+        return self._nullable_columns
     
     @property
     def required_columns(self) -> List[str]:
         """Get list of required (non-nullable) column names"""
-        return [col.name for col in self.columns if not col.nullable]
-    
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "name": "Customer",
-                "columns": [
-                    {
-                        "name": "CustomerId",
-                        "type": "INTEGER",
-                        "nullable": False,
-                        "primary_key": True
-                    }
-                ],
-                "primary_keys": ["CustomerId"],
-                "foreign_keys": [],
-                "row_count": 59
-            }
-        }
+        return self._required_columns
+    
+    model_config = ConfigDict(
+        defer_build=True,
+        json_schema_extra=openapi_example("TableInfo")
+    )
+
+
+@dataclass(frozen=True)
+class ColumnArrays:
+    """
+    Flat view of every column in a schema as parallel arrays: column i belongs
+    to tables[table_idx[i]], and the columns of table t are the index range
+    [table_offsets[t], table_offsets[t + 1]).
+    """
+    names: List[str]
+    types: List[str]
+    nullable: List[bool]
+    table_idx: array
+    table_offsets: array
+
+    @classmethod
+    def from_tables(cls, tables: List["TableInfo"]) -> "ColumnArrays":
+        names: List[str] = []
+        types: List[str] = []
+        nullable: List[bool] = []
+        table_idx = array("I")
+        table_offsets = array("I", [0])
+        for t, table in enumerate(tables):
+            for col in table.columns:
+                names.append(col.name)
+                types.append(col.type)
+                nullable.append(col.nullable)
+                table_idx.append(t)
+            table_offsets.append(len(names))
+        return cls(names, types, nullable, table_idx, table_offsets)
 
 
 class DatabaseSchema(BaseModel):
@@ -121,6 +141,50 @@ class DatabaseSchema(BaseModel):
     schema_version: str = Field(default="1.0", description="Schema version for caching")
     extracted_at: str = Field(..., description="When schema was extracted (ISO timestamp)")
     
+    # Lookup indices keyed by lowercased table names, built once after validation
+    _tables_by_lc_name: Dict[str, TableInfo] = PrivateAttr(default_factory=dict)
+    _rels_by_lc_pair: Dict[FrozenSet[str], List[ForeignKeyRelation]] = PrivateAttr(default_factory=dict)
+    _adjacency: Dict[str, Set[str]] = PrivateAttr(default_factory=dict)
+    _join_adjacency: Dict[str, List[Tuple[str, ForeignKeyRelation]]] = PrivateAttr(default_factory=dict)
+    _join_paths: Dict[Tuple[str, str, int], List[ForeignKeyRelation]] = PrivateAttr(default_factory=dict)
+    # Join graph (CSR arrays) and exact-name edge index, filled on first use by app.utils.schema_analyzer
+    _join_graph: Optional[Tuple[Any, ...]] = PrivateAttr(default=None)
+    _edge_index: Optional[Dict[Tuple[str, str], ForeignKeyRelation]] = PrivateAttr(default=None)
+    # Flat column arrays, set by introspection or built on first use by app.utils.schema_analyzer
+    _column_arrays: Optional[ColumnArrays] = PrivateAttr(default=None)
+    # Change-detection fingerprint, computed on first use by app.utils.schema_analyzer
+    _schema_hash: Optional[str] = PrivateAttr(default=None)
+    
+    @model_validator(mode="after")
+    def _build_indices(self) -> "DatabaseSchema":
+        tables_by_lc_name: Dict[str, TableInfo] = {}
+        for table in self.tables:
+            tables_by_lc_name.setdefault(table.name.lower(), table)
+        
+        # defaultdicts avoid allocating a throwaway container per setdefault call
+        rels_by_lc_pair: Dict[FrozenSet[str], List[ForeignKeyRelation]] = defaultdict(list)
+        adjacency: Dict[str, Set[str]] = defaultdict(set)
+        join_adjacency: Dict[str, List[Tuple[str, ForeignKeyRelation]]] = defaultdict(list)
+        for rel in self.relationships:
+            from_lc, to_lc = rel.from_table.lower(), rel.to_table.lower()
+            rels_by_lc_pair[frozenset((from_lc, to_lc))].append(rel)
+            adjacency[from_lc].add(rel.to_table)
+            adjacency[to_lc].add(rel.from_table)
+            join_adjacency[from_lc].append((to_lc, rel))
+            join_adjacency[to_lc].append((from_lc, rel))
+        
+        # Plain dicts from here on, so lookups of unknown tables don't insert keys
+        self._tables_by_lc_name = tables_by_lc_name
+        self._rels_by_lc_pair = dict(rels_by_lc_pair)
+        self._adjacency = dict(adjacency)
+        self._join_adjacency = dict(join_adjacency)
+        self._join_paths = {}
+        self._join_graph = None
+        self._edge_index = None
+        self._column_arrays = None
+        self._schema_hash = None
+        return self
+    
     @property
     def table_names(self) -> List[str]:
         """Get list of all table names"""
@@ -128,47 +192,67 @@ class DatabaseSchema(BaseModel):
     
     def get_table(self, table_name: str) -> Optional[TableInfo]:
         """Get table info by name"""
-        for table in self.tables:
-            if table.name.lower() == table_name.lower():
-                return table
-        return None
+        return self._tables_by_lc_name.get(table_name.lower())
     
     def get_related_tables(self, table_name: str) -> List[str]:
         """Get tables that are related to the given table via foreign keys"""
-        related = set()
-        for rel in self.relationships:
-            if rel.from_table.lower() == table_name.lower():
-                related.add(rel.to_table)
-            elif rel.to_table.lower() == table_name.lower():
-                related.add(rel.from_table)
-        return list(related)
-    
-    def get_join_path(self, table1: str, table2: str) -> List[ForeignKeyRelation]:
-        """Find foreign key path between two tables (simple direct relationship)"""
-        path = []
-        for rel in self.relationships:
-            if ((rel.from_table.lower() == table1.lower() and rel.to_table.lower() == table2.lower()) or
-                (rel.from_table.lower() == table2.lower() and rel.to_table.lower() == table1.lower())):
-                path.append(rel)
-        return path
-    
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "database_name": "chinook",
-                "database_type": "sqlite",
-                "tables": [],
-                "relationships": [],
-                "total_tables": 11,
-                "schema_version": "1.0",
-                "extracted_at": "2024-01-01T12:00:00Z"
-            }
-        }
+        return list(self._adjacency.get(table_name.lower(), ()))
+    
+    def get_join_path(self, table1: str, table2: str, max_depth: int = 3) -> List[ForeignKeyRelation]:
+        """
+        Find foreign key path between two tables.
+        Directly related tables return all their relationships; otherwise the
+        relationships along the shortest path of at most max_depth joins.
+        """
+        start, end = table1.lower(), table2.lower()
+        direct = self._rels_by_lc_pair.get(frozenset((start, end)))
+        if direct:
+            return list(direct)
+        
+        key = (start, end, max_depth)
+        path = self._join_paths.get(key)
+        if path is None:
+            path = self._join_paths[key] = self._bfs_join_path(start, end, max_depth)
+        return list(path)
+    
+    def _bfs_join_path(self, start: str, end: str, max_depth: int) -> List[ForeignKeyRelation]:
+        if start == end or start not in self._join_adjacency:
+            return []
+        
+        # Parent pointers: table -> (previous table, relationship used to reach it)
+        parents: Dict[str, Tuple[str, Optional[ForeignKeyRelation]]] = {start: (start, None)}
+        frontier = [start]
+        for _ in range(max_depth):
+            next_frontier = []
+            for table in frontier:
+                for neighbor, rel in self._join_adjacency[table]:
+                    if neighbor in parents:
+                        continue
+                    parents[neighbor] = (table, rel)
+                    if neighbor == end:
+                        path = []
+                        while neighbor != start:
+                            neighbor, rel = parents[neighbor]
+                            path.append(rel)
+                        path.reverse()
+                        return path
+                    next_frontier.append(neighbor)
+            if not next_frontier:
+                break
+            frontier = next_frontier
+        return []
+    
+    model_config = ConfigDict(
+        defer_build=True,
+        json_schema_extra=openapi_example("DatabaseSchema")
+    )
 
 
 # Response models for API endpoints
 class SchemaResponse(BaseModel):
     """Response model for schema information"""
+    model_config = ConfigDict(defer_build=True)
+    
     success: bool
     error: Optional[str] = None
     schema: Optional[DatabaseSchema] = None
@@ -176,6 +260,8 @@ class SchemaResponse(BaseModel):
 
 class TableResponse(BaseModel):
     """Response model for single table information"""
+    model_config = ConfigDict(defer_build=True)
+    
     success: bool
     error: Optional[str] = None
     table: Optional[TableInfo] = None
@@ -183,6 +269,96 @@ class TableResponse(BaseModel):
 
 class RelationshipsResponse(BaseModel):
     """Response model for relationship information"""
+    model_config = ConfigDict(defer_build=True)
+    
+    success: bool
+    error: Optional[str] = None
+    relationships: List[ForeignKeyRelation] = Field(default_factory=list) 
+
+class TableSummary(BaseModel):
+    """Per-table overview used in schema summaries"""
+    model_config = ConfigDict(defer_build=True)
+    
+    name: str
+    column_count: int
+    primary_keys: List[str] = Field(default_factory=list)
+    foreign_key_count: int = 0
+
+
+class SchemaSummary(BaseModel):
+    """Schema overview with relationship statistics"""
+    model_config = ConfigDict(defer_build=True)
+    
+    database_name: str
+    database_type: str
+    total_tables: int
+    total_columns: int
+    total_relationships: int
+    extracted_at: str
+    tables: List[TableSummary] = Field(default_factory=list)
+    relationship_analysis: Dict[str, Any] = Field(default_factory=dict)
+
+
+class SchemaSummaryResponse(BaseModel):
+    """Response model for schema summary"""
+    model_config = ConfigDict(defer_build=True)
+    
+    success: bool
+    error: Optional[str] = None
+    summary: Optional[SchemaSummary] = None
+
+
+class RelatedTablesResponse(BaseModel):
+    """Response model for tables related to a table"""
+    model_config = ConfigDict(defer_build=True)
+    
+    success: bool
+    error: Optional[str] = None
+    table_name: Optional[str] = None
+    related_tables: List[str] = Field(default_factory=list)
+
+
+class TableStatistics(BaseModel):
+    """Row count and column statistics for a table"""
+    model_config = ConfigDict(defer_build=True)
+    
+    row_count: int
+    column_count: int
+    nullable_columns: int
+    required_columns: int
+    column_types: Dict[str, int] = Field(default_factory=dict)
+    primary_keys: List[str] = Field(default_factory=list)
+    foreign_key_count: int = 0
+
+
+class TableStatisticsResponse(BaseModel):
+    """Response model for table statistics"""
+    model_config = ConfigDict(defer_build=True)
+    
+    success: bool
+    error: Optional[str] = None
+    table_name: Optional[str] = None
+    statistics: Optional[TableStatistics] = None
+
+
+class SchemaSearchResponse(BaseModel):
+    """Response model for schema search"""
+    model_config = ConfigDict(defer_build=True)
+    
+    success: bool
+    error: Optional[str] = None
+    query: str
+    search_type: str
+    results: Dict[str, List[Any]] = Field(default_factory=dict)
+    total_matches: int = 0
+
+
+class SchemaRefreshResponse(BaseModel):
+    """Response model for schema cache refresh"""
+    model_config = ConfigDict(defer_build=True)
+    
     success: bool
     error: Optional[str] = None
-    relationships: List[ForeignKeyRelation] = Field(default_factory=list) 
\ No newline at end of file
+    message: Optional[str] = None
+    total_tables: int = 0
+    extracted_at: Optional[str] = None
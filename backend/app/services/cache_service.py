@@ -1,36 +1,65 @@
+import sys
 import time
 import json
-import hashlib
-from typing import Dict, Any, Optional, List, Union
+from typing import Dict, Any, Optional, List, Tuple, Union
 from datetime import datetime, timedelta
 import logging
-from threading import Lock
+from threading import Lock, Timer
+from collections import OrderedDict
+
+import orjson
+
+from ..models.schema import DatabaseSchema, ForeignKeyRelation, TableInfo
 
 logger = logging.getLogger(__name__)
 
 
+def _estimate_size(value: Any) -> int:
+    """Approximate size of a cached value: its JSON length, or a shallow size if not serializable"""
+    try:
+        return len(orjson.dumps(value, default=_to_jsonable))
+    except TypeError:
+        return sys.getsizeof(value)
+
+
+def _to_jsonable(value: Any) -> Any:
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    raise TypeError
+
+
 class CacheEntry:
     """Represents a single cache entry with metadata"""
     
-    def __init__(self, key: str, value: Any, ttl_seconds: int = 1800):
+    __slots__ = ("key", "value", "created_at", "last_accessed", "ttl_seconds", "expires_at", "access_count", "size_hint")
+    
+    def __init__(self, key: str, value: Any, ttl_seconds: int = 1800, now: Optional[float] = None):
+        self.reset(key, value, ttl_seconds, now)
+    
+    def reset(self, key: str, value: Any, ttl_seconds: int = 1800, now: Optional[float] = None):
+        """(Re)initialize the entry in place; used when recycling pooled entries"""
+        if now is None:
+            now = time.monotonic()
         self.key = key
         self.value = value
-        self.created_at = time.time()
-        self.last_accessed = time.time()
+        self.created_at = now  # time.monotonic() clock
+        self.last_accessed = now
         self.ttl_seconds = ttl_seconds
+        self.expires_at = now + ttl_seconds
         self.access_count = 0
+        self.size_hint: Optional[int] = None  # filled in lazily by get_stats()
     
-    def is_expired(self) -> bool:
+    def is_expired(self, now: Optional[float] = None) -> bool:
         """Check if the cache entry has expired"""
-        return time.time() - self.created_at > self.ttl_seconds
+        return (time.monotonic() if now is None else now) > self.expires_at
     
-    def is_stale(self, stale_threshold_seconds: int = 300) -> bool:
+    def is_stale(self, stale_threshold_seconds: int = 300, now: Optional[float] = None) -> bool:
         """Check if the cache entry is stale (not recently accessed)"""
-        return time.time() - self.last_accessed > stale_threshold_seconds
+        return (time.monotonic() if now is None else now) - self.last_accessed > stale_threshold_seconds
     
-    def access(self):
+    def access(self, now: Optional[float] = None):
         """Mark the entry as accessed"""
-        self.last_accessed = time.time()
+        self.last_accessed = time.monotonic() if now is None else now
         self.access_count += 1
     
     def to_dict(self) -> Dict[str, Any]:
@@ -48,101 +77,130 @@ class CacheEntry:
 class CacheService:
     """Service for caching database schema, relationships, and other data"""
     
-    def __init__(self, max_size: int = 100, cleanup_interval: int = 300):
-        self._cache: Dict[str, CacheEntry] = {}
+    def __init__(self, max_size: int = 100, cleanup_interval: int = 300, entry_pool_size: int = 32):
+        # Ordered from least to most recently used
+        self._cache: "OrderedDict[str, CacheEntry]" = OrderedDict()
         self._max_size = max_size
+        # Removed entries are recycled by set() instead of allocating new ones
+        self._entry_pool: List[CacheEntry] = []
+        self._entry_pool_size = entry_pool_size
         self._cleanup_interval = cleanup_interval
-        self._last_cleanup = time.time()
+        self._last_cleanup_at = time.time()  # wall clock, for stats
         self._lock = Lock()
         
         # Cache prefixes for different types of data
         self.PREFIXES = {
             "schema": "schema:",
+            "schema_response": "schema_response:",
             "relationships": "rel:",
             "tables": "table:",
             "statistics": "stats:",
             "join_paths": "path:",
             "analysis": "analysis:"
         }
+        
+        # Expired entries are dropped lazily on access; a background timer
+        # sweeps the rest so request paths never scan the whole cache
+        self._schedule_cleanup()
     
     def _generate_key(self, prefix: str, *args) -> str:
         """Generate a cache key from prefix and arguments"""
-        key_parts = [prefix] + [str(arg) for arg in args]
-        key_string = ":".join(key_parts)
-        return hashlib.md5(key_string.encode()).hexdigest()
+        return prefix + ":".join(map(str, args))
+    
+    def _new_entry(self, key: str, value: Any, ttl_seconds: int, now: float) -> CacheEntry:
+        try:
+            entry = self._entry_pool.pop()
+        except IndexError:
+            return CacheEntry(key, value, ttl_seconds, now)
+        entry.reset(key, value, ttl_seconds, now)
+        return entry
+    
+    def _recycle(self, entry: CacheEntry):
+        """Return a removed entry to the pool; call with the lock held"""
+        if len(self._entry_pool) < self._entry_pool_size:
+            entry.key = entry.value = None  # don't keep the cached value alive
+            self._entry_pool.append(entry)
+    
+    def _schedule_cleanup(self):
+        if self._cleanup_interval <= 0:
+            return
+        timer = Timer(self._cleanup_interval, self._run_cleanup)
+        timer.daemon = True
+        timer.start()
+    
+    def _run_cleanup(self):
+        try:
+            self._cleanup_expired()
+        finally:
+            self._schedule_cleanup()
     
     def _cleanup_expired(self):
         """Remove expired cache entries"""
-        current_time = time.time()
-        if current_time - self._last_cleanup < self._cleanup_interval:
-            return
-        
+        now = time.monotonic()
         with self._lock:
             expired_keys = [
                 key for key, entry in self._cache.items()
-                if entry.is_expired()
+                if entry.expires_at < now
             ]
             
             for key in expired_keys:
-                del self._cache[key]
-                logger.debug(f"Removed expired cache entry: {key}")
+                self._recycle(self._cache.pop(key))
             
-            self._last_cleanup = current_time
-    
-    def _evict_if_needed(self):
-        """Evict least recently used entries if cache is full"""
-        if len(self._cache) < self._max_size:
-            return
+            self._last_cleanup_at = time.time()
         
-        with self._lock:
-            # Sort by last accessed time and remove oldest
-            sorted_entries = sorted(
-                self._cache.items(),
-                key=lambda x: x[1].last_accessed
-            )
-            
-            # Remove 20% of oldest entries
-            evict_count = max(1, len(sorted_entries) // 5)
-            for i in range(evict_count):
-                key, _ = sorted_entries[i]
-                del self._cache[key]
-                logger.debug(f"Evicted cache entry: {key}")
+        for key in expired_keys:
+            logger.debug("Removed expired cache entry: %s", key)
     
     def get(self, key: str) -> Optional[Any]:
         """Get a value from cache"""
-        self._cleanup_expired()
+        now = time.monotonic()
         
         with self._lock:
             entry = self._cache.get(key)
             if entry is None:
                 return None
             
-            if entry.is_expired():
-                del self._cache[key]
+            if entry.expires_at < now:
+                self._recycle(self._cache.pop(key))
                 return None
             
-            entry.access()
+            entry.access(now)
+            self._cache.move_to_end(key)
             return entry.value
     
     def set(self, key: str, value: Any, ttl_seconds: int = 1800) -> bool:
         """Set a value in cache with TTL"""
-        self._cleanup_expired()
-        self._evict_if_needed()
+        # Build the entry before taking the lock
+        entry = self._new_entry(key, value, ttl_seconds, time.monotonic())
+        evicted: List[str] = []
         
         with self._lock:
-            entry = CacheEntry(key, value, ttl_seconds)
+            replaced = self._cache.pop(key, None)
+            if replaced is not None:
+                self._recycle(replaced)
             self._cache[key] = entry
-            logger.debug(f"Cached entry: {key} (TTL: {ttl_seconds}s)")
-            return True
+            
+            # Evict least recently used entries
+            while len(self._cache) > self._max_size:
+                evicted_key, evicted_entry = self._cache.popitem(last=False)
+                evicted.append(evicted_key)
+                self._recycle(evicted_entry)
+        
+        for evicted_key in evicted:
+            logger.debug("Evicted cache entry: %s", evicted_key)
+        logger.debug("Cached entry: %s (TTL: %ss)", key, ttl_seconds)
+        return True
     
     def delete(self, key: str) -> bool:
         """Delete a cache entry"""
         with self._lock:
-            if key in self._cache:
-                del self._cache[key]
-                logger.debug(f"Deleted cache entry: {key}")
-                return True
-            return False
+            entry = self._cache.pop(key, None)
+            deleted = entry is not None
+            if deleted:
+                self._recycle(entry)
+        if deleted:
+            logger.debug("Deleted cache entry: %s", key)
+        return deleted
     
     def clear(self, prefix: Optional[str] = None) -> int:
         """Clear cache entries, optionally by prefix"""
@@ -150,96 +208,124 @@ class CacheService:
             if prefix is None:
                 count = len(self._cache)
                 self._cache.clear()
-                logger.info(f"Cleared all cache entries ({count} entries)")
-                return count
-            
-            keys_to_delete = [
-                key for key in self._cache.keys()
-                if key.startswith(prefix)
-            ]
-            
-            for key in keys_to_delete:
-                del self._cache[key]
-            
-            logger.info(f"Cleared cache entries with prefix '{prefix}' ({len(keys_to_delete)} entries)")
-            return len(keys_to_delete)
+            else:
+                keys_to_delete = [
+                    key for key in self._cache.keys()
+                    if key.startswith(prefix)
+                ]
+                
+                for key in keys_to_delete:
+                    self._recycle(self._cache.pop(key))
+                count = len(keys_to_delete)
+        
+        if prefix is None:
+            logger.info("Cleared all cache entries (%s entries)", count)
+        else:
+            logger.info("Cleared cache entries with prefix '%s' (%s entries)", prefix, count)
+        return count
     
     def exists(self, key: str) -> bool:
         """Check if a key exists in cache and is not expired"""
-        self._cleanup_expired()
+        now = time.monotonic()
         
         with self._lock:
             entry = self._cache.get(key)
-            if entry is None or entry.is_expired():
+            if entry is None:
+                return False
+            if entry.expires_at < now:
+                self._recycle(self._cache.pop(key))
                 return False
             return True
     
     def get_stats(self) -> Dict[str, Any]:
         """Get cache statistics"""
+        # Stats are approximate: copy the entries under the lock, aggregate outside it
         with self._lock:
-            current_time = time.time()
-            total_entries = len(self._cache)
-            expired_entries = sum(1 for entry in self._cache.values() if entry.is_expired())
-            active_entries = total_entries - expired_entries
-            
-            # Calculate average access count
-            total_access = sum(entry.access_count for entry in self._cache.values())
-            avg_access = total_access / total_entries if total_entries > 0 else 0
-            
-            # Calculate memory usage (rough estimate)
-            memory_usage = sum(
-                len(str(entry.value)) for entry in self._cache.values()
-            )
-            
-            return {
-                "total_entries": total_entries,
-                "active_entries": active_entries,
-                "expired_entries": expired_entries,
-                "max_size": self._max_size,
-                "utilization_percent": (total_entries / self._max_size) * 100 if self._max_size > 0 else 0,
-                "total_access_count": total_access,
-                "average_access_count": avg_access,
-                "estimated_memory_bytes": memory_usage,
-                "last_cleanup": datetime.fromtimestamp(self._last_cleanup).isoformat()
-            }
+            entries = tuple(self._cache.values())
+            last_cleanup_at = self._last_cleanup_at
+        
+        now = time.monotonic()
+        total_entries = len(entries)
+        expired_entries = sum(1 for entry in entries if entry.expires_at < now)
+        active_entries = total_entries - expired_entries
+        
+        # Calculate average access count
+        total_access = sum(entry.access_count for entry in entries)
+        avg_access = total_access / total_entries if total_entries > 0 else 0
+        
+        # Calculate memory usage (rough estimate, computed once per entry)
+        memory_usage = 0
+        for entry in entries:
+            size_hint = entry.size_hint
+            if size_hint is None:
+                value = entry.value
+                if value is None:  # recycled since the snapshot
+                    continue
+                size_hint = entry.size_hint = _estimate_size(value)
+            memory_usage += size_hint
+        
+        return {
+            "total_entries": total_entries,
+            "active_entries": active_entries,
+            "expired_entries": expired_entries,
+            "max_size": self._max_size,
+            "utilization_percent": (total_entries / self._max_size) * 100 if self._max_size > 0 else 0,
+            "total_access_count": total_access,
+            "average_access_count": avg_access,
+            "estimated_memory_bytes": memory_usage,
+            "last_cleanup": datetime.fromtimestamp(last_cleanup_at).isoformat()
+        }
     
     # Schema-specific cache methods
-    def get_schema(self, database_name: str) -> Optional[Dict[str, Any]]:
+    def get_schema(self, database_name: str) -> Optional[DatabaseSchema]:
         """Get cached database schema"""
         key = self._generate_key(self.PREFIXES["schema"], database_name)
         return self.get(key)
     
-    def set_schema(self, database_name: str, schema: Dict[str, Any], ttl_seconds: int = 1800) -> bool:
-        """Cache database schema"""
+    def set_schema(self, database_name: str, schema: DatabaseSchema, ttl_seconds: int = 1800) -> bool:
+        """Cache database schema (the model itself; it is not dumped or re-validated)"""
         key = self._generate_key(self.PREFIXES["schema"], database_name)
         return self.set(key, schema, ttl_seconds)
     
+    def get_schema_response(self, database_name: str) -> Optional[Tuple[float, bytes]]:
+        """Get the cached, pre-encoded schema response as (fetched_at, body)"""
+        key = self._generate_key(self.PREFIXES["schema_response"], database_name)
+        return self.get(key)
+    
+    def set_schema_response(self, database_name: str, fetched_at: float, body: bytes, ttl_seconds: int = 1800) -> bool:
+        """Cache a pre-encoded schema response"""
+        key = self._generate_key(self.PREFIXES["schema_response"], database_name)
+        return self.set(key, (fetched_at, body), ttl_seconds)
+    
     def clear_schema_cache(self, database_name: Optional[str] = None) -> int:
-        """Clear schema cache"""
+        """Clear schema cache, including pre-encoded schema responses"""
         if database_name:
-            key = self._generate_key(self.PREFIXES["schema"], database_name)
-            return 1 if self.delete(key) else 0
+            keys = (
+                self._generate_key(self.PREFIXES["schema"], database_name),
+                self._generate_key(self.PREFIXES["schema_response"], database_name),
+            )
+            return sum(1 for key in keys if self.delete(key))
         else:
-            return self.clear(self.PREFIXES["schema"])
+            return self.clear(self.PREFIXES["schema"]) + self.clear(self.PREFIXES["schema_response"])
     
     # Table-specific cache methods
-    def get_table_info(self, database_name: str, table_name: str) -> Optional[Dict[str, Any]]:
+    def get_table_info(self, database_name: str, table_name: str) -> Optional[TableInfo]:
         """Get cached table information"""
         key = self._generate_key(self.PREFIXES["tables"], database_name, table_name)
         return self.get(key)
     
-    def set_table_info(self, database_name: str, table_name: str, table_info: Dict[str, Any], ttl_seconds: int = 3600) -> bool:
+    def set_table_info(self, database_name: str, table_name: str, table_info: TableInfo, ttl_seconds: int = 3600) -> bool:
         """Cache table information"""
         key = self._generate_key(self.PREFIXES["tables"], database_name, table_name)
         return self.set(key, table_info, ttl_seconds)
     
     # Relationship-specific cache methods
-    def get_relationships(self, database_name: str) -> Optional[List[Dict[str, Any]]]:
+    def get_relationships(self, database_name: str) -> Optional[List[ForeignKeyRelation]]:
         """Get cached relationships"""
         key = self._generate_key(self.PREFIXES["relationships"], database_name)
         return self.get(key)
     
-    def set_relationships(self, database_name: str, relationships: List[Dict[str, Any]], ttl_seconds: int = 1800) -> bool:
+    def set_relationships(self, database_name: str, relationships: List[ForeignKeyRelation], ttl_seconds: int = 1800) -> bool:
         """Cache relationships"""
         key = self._generate_key(self.PREFIXES["relationships"], database_name)
         return self.set(key, relationships, ttl_seconds)
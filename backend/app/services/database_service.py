@@ -1,6 +1,9 @@
 from langchain_community.utilities import SQLDatabase
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
 from typing import Optional, Dict, List, Any
-from utils.database_factory import DatabaseFactory
+from app.utils.database_factory import DatabaseFactory
+from app.services.cache_service import cache_service
 import logging
 
 logger = logging.getLogger(__name__)
@@ -25,23 +28,15 @@ class DatabaseService:
                     "connection_info": None
                 }
             
-            # Test the connection
-            is_working, test_error = DatabaseFactory.test_connection(db)
-            
-            if not is_working:
-                return {
-                    "success": False,
-                    "error": f"Connection test failed: {test_error}",
-                    "connection_info": None
-                }
-            
-            # Store connection
+            # create_sqlite_connection has already probed the database
+            # Store connection; drop anything cached from an earlier session on it
+            cache_service.clear_schema_cache(str(db._engine.url))
             self._current_db = db
             self._connection_info = {
                 "database_type": "sqlite",
                 "database_path": "chinook.db",
                 "dialect": db.dialect,
-                "tables_count": len(db.get_usable_table_names())
+                "tables_count": DatabaseFactory.count_tables(db)
             }
             
             logger.info("Successfully connected to default database")
@@ -72,23 +67,15 @@ class DatabaseService:
                     "connection_info": None
                 }
             
-            # Test the connection
-            is_working, test_error = DatabaseFactory.test_connection(db)
-            
-            if not is_working:
-                return {
-                    "success": False,
-                    "error": f"Connection test failed: {test_error}",
-                    "connection_info": None
-                }
-            
-            # Store connection
+            # create_sqlite_connection has already probed the database
+            # Store connection; drop anything cached from an earlier session on it
+            cache_service.clear_schema_cache(str(db._engine.url))
             self._current_db = db
             self._connection_info = {
                 "database_type": "sqlite",
                 "database_path": db_path,
                 "dialect": db.dialect,
-                "tables_count": len(db.get_usable_table_names())
+                "tables_count": DatabaseFactory.count_tables(db)
             }
             
             logger.info(f"Successfully connected to custom database: {db_path}")
@@ -144,20 +131,30 @@ class DatabaseService:
                 "tables": []
             }
     
-    def test_current_connection(self) -> Dict[str, Any]:
-        """Test current database connection"""
+    def test_current_connection(self, conn: Optional[Connection] = None) -> Dict[str, Any]:
+        """Test current database connection, on conn when the caller already holds one"""
         if not self._current_db:
             return {
                 "success": False,
                 "error": "No database connection"
             }
         
-        is_working, error = DatabaseFactory.test_connection(self._current_db)
-        
-        return {
-            "success": is_working,
-            "error": error
-        }
+        try:
+            if conn is not None:
+                conn.execute(text("SELECT 1"))
+            else:
+                # Probe through the engine's pool instead of opening a new connection
+                with self._current_db._engine.connect() as pooled:
+                    pooled.execute(text("SELECT 1"))
+            return {
+                "success": True,
+                "error": None
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Connection test failed: {str(e)}"
+            }
     
     def get_current_database(self) -> Optional[SQLDatabase]:
         """Get current LangChain SQLDatabase instance for SQL generation"""
@@ -166,6 +163,9 @@ class DatabaseService:
     def disconnect(self) -> Dict[str, Any]:
         """Disconnect from current database"""
         try:
+            if self._current_db is not None:
+                # Drop the cached schema so a reconnect reflects any changes
+                cache_service.clear_schema_cache(str(self._current_db._engine.url))
             self._current_db = None
             self._connection_info = {}
             
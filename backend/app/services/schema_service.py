@@ -1,59 +1,365 @@
 # Schema intelligence
-from typing import Dict, Any, List
-from sqlalchemy import create_engine, text, inspect
+import logging
+from dataclasses import dataclass
+from threading import Lock
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from .cache_service import cache_service
+from .database_service import database_service
+from ..models.schema import DatabaseSchema, ForeignKeyRelation
+from ..utils.schema_analyzer import introspect_schema, analyze_relationships
+
+logger = logging.getLogger(__name__)
+
+SEARCH_TYPES = ("tables", "columns", "relationships", "all")
+
+
+@dataclass(frozen=True)
+class GraphSoA:
+    """
+    Relationship graph as parallel arrays: edge i goes from table from_idx[i]
+    to table to_idx[i] and is described by relationships[i].
+    Table indices refer to table_names and are case-insensitive.
+    """
+    table_names: List[str]
+    table_index: Dict[str, int]
+    from_idx: np.ndarray
+    to_idx: np.ndarray
+    relationships: List[ForeignKeyRelation]
+
+    @classmethod
+    def from_schema(cls, schema: DatabaseSchema) -> "GraphSoA":
+        table_index: Dict[str, int] = {}
+        from_idx = np.empty(len(schema.relationships), dtype=np.int32)
+        to_idx = np.empty(len(schema.relationships), dtype=np.int32)
+        for i, rel in enumerate(schema.relationships):
+            from_idx[i] = table_index.setdefault(rel.from_table.lower(), len(table_index))
+            to_idx[i] = table_index.setdefault(rel.to_table.lower(), len(table_index))
+        return cls(
+            table_names=list(table_index),
+            table_index=table_index,
+            from_idx=from_idx,
+            to_idx=to_idx,
+            relationships=list(schema.relationships)
+        )
+
+    def edges_of(self, table_name: str) -> List[ForeignKeyRelation]:
+        """Relationships touching a table (either end)"""
+        t = self.table_index.get(table_name.lower())
+        if t is None:
+            return []
+        return [self.relationships[i] for i in np.flatnonzero((self.from_idx == t) | (self.to_idx == t))]
+
 
 class SchemaService:
+    """
+    Service for schema introspection and lookups.
+    Methods are synchronous (SQLAlchemy reflection blocks); async callers
+    should run them in a worker thread.
+    """
+
     def __init__(self):
-        self.engine = None
-    
+        self.engine: Optional[Engine] = None
+        # Graph for the most recently loaded schema, keyed by (database, extracted_at)
+        self._graph: Optional[Tuple[Tuple[str, str], GraphSoA]] = None
+        self._graph_lock = Lock()
+
     def set_engine(self, engine):
         """Set the database engine"""
         self.engine = engine
-    
-    async def get_table_schema(self, table_name: str) -> Dict[str, Any]:
+
+    def _get_engine(self) -> Engine:
+        """Explicitly set engine, falling back to the current database connection"""
+        if self.engine is not None:
+            return self.engine
+
+        current_db = database_service.get_current_database()
+        if current_db is None:
+            raise ValueError("No database connection")
+        return current_db._engine
+
+    def current_database_key(self) -> Optional[str]:
+        """Cache key for the current database, or None when not connected"""
+        try:
+            return str(self._get_engine().url)
+        except ValueError:
+            return None
+
+    def _load_schema(self, force_refresh: bool = False) -> DatabaseSchema:
+        """Get the database schema, introspecting only on cache miss or refresh"""
+        return self.load_schema(self._get_engine(), force_refresh)
+
+    def load_schema(self, engine: Engine, force_refresh: bool = False) -> DatabaseSchema:
+        """
+        Get the schema of a specific engine, cached by engine URL.
+        The entry is dropped when the database is disconnected.
+        """
+        database_name = str(engine.url)
+
+        if not force_refresh:
+            cached = cache_service.get_schema(database_name)
+            if cached is not None:
+                return cached
+
+        schema = introspect_schema(engine)
+        cache_service.set_schema(database_name, schema)
+        return schema
+
+    def _get_graph(self, schema: DatabaseSchema) -> GraphSoA:
+        """Relationship graph for a schema, built once per extracted schema"""
+        key = (schema.database_name, schema.extracted_at)
+        with self._graph_lock:
+            if self._graph is None or self._graph[0] != key:
+                self._graph = (key, GraphSoA.from_schema(schema))
+            return self._graph[1]
+
+    def get_complete_schema(self, force_refresh: bool = False) -> Dict[str, Any]:
+        """Get complete schema including tables, columns and relationships"""
+        try:
+            schema = self._load_schema(force_refresh)
+            return {
+                "success": True,
+                "error": None,
+                "schema": schema
+            }
+        except Exception as e:
+            logger.error("Failed to get schema: %s", e)
+            return {
+                "success": False,
+                "error": str(e),
+                "schema": None
+            }
+
+    def get_schema_summary(self) -> Dict[str, Any]:
+        """Get schema overview and relationship statistics"""
+        try:
+            schema = self._load_schema()
+            return {
+                "success": True,
+                "error": None,
+                "summary": {
+                    "database_name": schema.database_name,
+                    "database_type": schema.database_type,
+                    "total_tables": schema.total_tables,
+                    "total_columns": sum(len(t.columns) for t in schema.tables),
+                    "total_relationships": len(schema.relationships),
+                    "extracted_at": schema.extracted_at,
+                    "tables": [
+                        {
+                            "name": t.name,
+                            "column_count": len(t.columns),
+                            "primary_keys": t.primary_keys,
+                            "foreign_key_count": len(t.foreign_keys)
+                        }
+                        for t in schema.tables
+                    ],
+                    "relationship_analysis": analyze_relationships(schema)
+                }
+            }
+        except Exception as e:
+            logger.error("Failed to get schema summary: %s", e)
+            return {
+                "success": False,
+                "error": str(e),
+                "summary": None
+            }
+
+    def get_table_schema(self, table_name: str) -> Dict[str, Any]:
         """Get schema for a specific table"""
         try:
-            if not self.engine:
-                raise Exception("Database engine not set")
-            
-            inspector = inspect(self.engine)
-            
-            # Get columns
-            columns = inspector.get_columns(table_name)
-            
-            # Get primary keys
-            primary_keys = inspector.get_pk_constraint(table_name)['constrained_columns']
-            
-            # Get foreign keys
-            foreign_keys = inspector.get_foreign_keys(table_name)
-            
-            return {
-                "table_name": table_name,
-                "columns": columns,
-                "primary_keys": primary_keys,
-                "foreign_keys": foreign_keys
-            }
-        except Exception as e:
-            raise Exception(f"Failed to get table schema: {str(e)}")
-    
-    async def get_relationships(self) -> List[Dict[str, Any]]:
-        """Get relationships between tables"""
-        try:
-            if not self.engine:
-                raise Exception("Database engine not set")
-            
-            inspector = inspect(self.engine)
-            tables = inspector.get_table_names()
-            relationships = []
-            
-            for table in tables:
-                foreign_keys = inspector.get_foreign_keys(table)
-                for fk in foreign_keys:
-                    relationships.append({
-                        "table": table,
-                        "foreign_key": fk
-                    })
-            
-            return relationships
-        except Exception as e:
-            raise Exception(f"Failed to get relationships: {str(e)}") 
\ No newline at end of file
+            table = self._load_schema().get_table(table_name)
+            if table is None:
+                return {
+                    "success": False,
+                    "error": "Table does not exist",
+                    "table": None
+                }
+
+            return {
+                "success": True,
+                "error": None,
+                "table": table
+            }
+        except Exception as e:
+            logger.error("Failed to get table schema: %s", e)
+            return {
+                "success": False,
+                "error": str(e),
+                "table": None
+            }
+
+    def get_relationships(self, table_name: Optional[str] = None) -> Dict[str, Any]:
+        """Get foreign key relationships, optionally only those touching one table"""
+        try:
+            schema = self._load_schema()
+            if table_name:
+                relationships = self._get_graph(schema).edges_of(table_name)
+            else:
+                relationships = schema.relationships
+
+            return {
+                "success": True,
+                "error": None,
+                "relationships": relationships
+            }
+        except Exception as e:
+            logger.error("Failed to get relationships: %s", e)
+            return {
+                "success": False,
+                "error": str(e),
+                "relationships": []
+            }
+
+    def get_related_tables(self, table_name: str) -> Dict[str, Any]:
+        """Get tables connected to the given table via foreign keys"""
+        try:
+            schema = self._load_schema()
+            table = schema.get_table(table_name)
+            if table is None:
+                return {
+                    "success": False,
+                    "error": "Table does not exist"
+                }
+
+            return {
+                "success": True,
+                "error": None,
+                "table_name": table.name,
+                "related_tables": sorted(schema.get_related_tables(table.name))
+            }
+        except Exception as e:
+            logger.error("Failed to get related tables: %s", e)
+            return {
+                "success": False,
+                "error": str(e)
+            }
+
+    def get_table_statistics(self, table_name: str, conn: Optional[Connection] = None) -> Dict[str, Any]:
+        """
+        Get row count and column statistics for a table.
+        The row count runs on conn when given, otherwise on a pooled connection.
+        """
+        try:
+            engine = self._get_engine()
+            table = self._load_schema().get_table(table_name)
+            if table is None:
+                return {
+                    "success": False,
+                    "error": "Table does not exist"
+                }
+
+            database_name = str(engine.url)
+            statistics = cache_service.get_statistics(database_name, table.name)
+            if statistics is None:
+                quoted = engine.dialect.identifier_preparer.quote(table.name)
+                count_query = text(f"SELECT COUNT(*) FROM {quoted}")
+                if conn is not None:
+                    row_count = conn.execute(count_query).scalar()
+                else:
+                    with engine.connect() as pooled:
+                        row_count = pooled.execute(count_query).scalar()
+
+                column_types: Dict[str, int] = {}
+                for col in table.columns:
+                    column_types[col.type_category.value] = column_types.get(col.type_category.value, 0) + 1
+
+                statistics = {
+                    "row_count": row_count,
+                    "column_count": len(table.columns),
+                    "nullable_columns": len(table.nullable_columns),
+                    "required_columns": len(table.required_columns),
+                    "column_types": column_types,
+                    "primary_keys": table.primary_keys,
+                    "foreign_key_count": len(table.foreign_keys)
+                }
+                cache_service.set_statistics(database_name, table.name, statistics)
+
+            return {
+                "success": True,
+                "error": None,
+                "table_name": table.name,
+                "statistics": statistics
+            }
+        except Exception as e:
+            logger.error("Failed to get table statistics: %s", e)
+            return {
+                "success": False,
+                "error": str(e)
+            }
+
+    def search_schema(self, query: str, search_type: str = "all") -> Dict[str, Any]:
+        """Case-insensitive substring search over tables, columns and relationships"""
+        if search_type not in SEARCH_TYPES:
+            return {
+                "success": False,
+                "error": f"Invalid search type '{search_type}', expected one of: {', '.join(SEARCH_TYPES)}"
+            }
+
+        try:
+            schema = self._load_schema()
+            term = query.lower()
+            results: Dict[str, List[Any]] = {}
+
+            if search_type in ("tables", "all"):
+                results["tables"] = [t.name for t in schema.tables if term in t.name.lower()]
+
+            if search_type in ("columns", "all"):
+                results["columns"] = [
+                    {"table": t.name, "column": c.name, "type": c.type}
+                    for t in schema.tables
+                    for c in t.columns
+                    if term in c.name.lower()
+                ]
+
+            if search_type in ("relationships", "all"):
+                results["relationships"] = [
+                    rel for rel in schema.relationships
+                    if term in rel.from_table.lower() or term in rel.to_table.lower()
+                    or term in rel.from_column.lower() or term in rel.to_column.lower()
+                ]
+
+            return {
+                "success": True,
+                "error": None,
+                "query": query,
+                "search_type": search_type,
+                "results": results,
+                "total_matches": sum(len(v) for v in results.values())
+            }
+        except Exception as e:
+            logger.error("Schema search failed: %s", e)
+            return {
+                "success": False,
+                "error": str(e)
+            }
+
+    def refresh_schema_cache(self) -> Dict[str, Any]:
+        """Drop cached schema data and introspect again"""
+        try:
+            database_name = str(self._get_engine().url)
+            cache_service.clear_schema_cache(database_name)
+            schema = self._load_schema(force_refresh=True)
+
+            logger.info("Refreshed schema cache for %s", schema.database_name)
+
+            return {
+                "success": True,
+                "error": None,
+                "message": "Schema cache refreshed",
+                "total_tables": schema.total_tables,
+                "extracted_at": schema.extracted_at
+            }
+        except Exception as e:
+            logger.error("Failed to refresh schema cache: %s", e)
+            return {
+                "success": False,
+                "error": str(e)
+            }
+
+
+# Global schema service instance
+schema_service = SchemaService()
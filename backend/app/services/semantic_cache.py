@@ -0,0 +1,372 @@
+from __future__ import annotations
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+from ..core.validators import validate_sql
+from ..models.responses import SQLGenerationResponse
+from ..utils.config import settings
+from ..utils.retrieval import embed_query
+
+try:
+    import numpy as np
+except ImportError:  # semantic tier is disabled without numpy
+    np = None
+
+logger = logging.getLogger(__name__)
+
+# Quoted literals and bare numbers are treated as template parameters
+_PARAM_RE = re.compile(r"'([^']*)'|\"([^\"]*)\"|\b(\d+(?:\.\d+)?)\b")
+_PLACEHOLDER_RE = re.compile(r"\{p(\d+)\}")
+# Substituted values may not carry quotes, statement separators, comments or whitespace
+_UNSAFE_PARAM_RE = re.compile(r"['\";\s]|--")
+# Placeholders outside SQL quotes only accept a bare number or identifier
+_BARE_VALUE_RE = re.compile(r"[\w.]+")
+
+
+def _normalize(query: str) -> str:
+    """Normalize a natural language query for exact matching"""
+    return " ".join(query.strip().lower().split())
+
+
+def _query_key(scope: str, query: str) -> bytes:
+    """Exact-match key for a query within a cache scope"""
+    return hashlib.blake2b(f"{scope}\x00{_normalize(query)}".encode("utf-8"), digest_size=16, usedforsecurity=False).digest()
+
+
+def _parameterize(query: str) -> Tuple[str, List[str]]:
+    """
+    Replace literals in a query with {p0}, {p1}, ... placeholders.
+    Quotes stay around the placeholder, so a template that held a bare number
+    only matches queries with a bare number in that position.
+    Parameter values keep their original case.
+    Returns: (template, parameter values)
+    """
+    params: List[str] = []
+
+    def repl(m: re.Match) -> str:
+        value = next(g for g in m.groups() if g is not None)
+        params.append(value)
+        placeholder = f"{{p{len(params) - 1}}}"
+        if m.group(1) is not None:
+            return f"'{placeholder}'"
+        if m.group(2) is not None:
+            return f'"{placeholder}"'
+        return placeholder
+
+    return _PARAM_RE.sub(repl, " ".join(query.split())).lower(), params
+
+
+def _sql_template(sql: str, params: List[str]) -> Optional[str]:
+    """
+    Turn generated SQL into a template by replacing each parameter value.
+    Only safe when every value appears exactly once in the SQL.
+    """
+    if not params or len(set(params)) != len(params):
+        return None
+    template = sql
+    for i, value in enumerate(params):
+        pattern = re.compile(rf"(?<![\w.]){re.escape(value)}(?![\w.])", re.IGNORECASE)
+        if len(pattern.findall(template)) != 1:
+            return None
+        template = pattern.sub(f"{{p{i}}}", template)
+    return template
+
+
+class _ScopeCache:
+    """Cached entries for a single (dialect, schema) scope"""
+
+    def __init__(self):
+        self.exact: "OrderedDict[bytes, Tuple[str, str, float]]" = OrderedDict()
+        self.templates: "OrderedDict[str, Tuple[str, str, float]]" = OrderedDict()
+        self.vectors: List[List[float]] = []
+        self.vector_sql: List[Tuple[str, str, float]] = []
+        self.matrix = None  # normalized (N, D) matrix, rebuilt lazily
+
+
+class SemanticSQLCache:
+    """
+    Multi-tier cache for generated SQL:
+    tier 0 exact query hash, tier 1 literal-parameterized template,
+    tier 2 embedding cosine similarity. Entries persist to SQLite.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        max_size: int = 1024,
+        similarity_threshold: float = 0.92,
+        max_scopes: int = 16
+    ):
+        self._db_path = db_path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._max_size = max_size
+        self._threshold = similarity_threshold
+        # Scopes are kept least recently used first; evicted ones reload from SQLite
+        self._scopes: "OrderedDict[str, _ScopeCache]" = OrderedDict()
+        self._max_scopes = max_scopes
+        self._lock = Lock()
+        self._hits = {"exact": 0, "template": 0, "semantic": 0}
+        self._misses = 0
+        if self._db_path:
+            self._init_db()
+
+    # Persistence (all access happens under self._lock)
+    def _init_db(self):
+        try:
+            os.makedirs(os.path.dirname(self._db_path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self._db_path, check_same_thread=False)
+            with self._conn as conn:
+                conn.execute(
+                    """CREATE TABLE IF NOT EXISTS sql_cache (
+                        scope TEXT NOT NULL,
+                        query_key BLOB NOT NULL,
+                        template TEXT,
+                        sql_template TEXT,
+                        sql TEXT NOT NULL,
+                        explanation TEXT NOT NULL,
+                        confidence REAL NOT NULL,
+                        embedding BLOB,
+                        PRIMARY KEY (scope, query_key)
+                    )"""
+                )
+        except (sqlite3.Error, OSError) as e:
+            logger.warning("Semantic cache persistence disabled: %s", e)
+            self._conn = None
+
+    def _load_scope(self, scope: str) -> _ScopeCache:
+        """Get the in-memory cache for a scope, hydrating it from SQLite on first use"""
+        cache = self._scopes.get(scope)
+        if cache is not None:
+            self._scopes.move_to_end(scope)
+            return cache
+
+        cache = _ScopeCache()
+        self._scopes[scope] = cache
+        while len(self._scopes) > self._max_scopes:
+            self._scopes.popitem(last=False)
+        if self._conn is None:
+            return cache
+
+        try:
+            rows = self._conn.execute(
+                "SELECT query_key, template, sql_template, sql, explanation, confidence, embedding "
+                "FROM sql_cache WHERE scope = ? ORDER BY rowid DESC LIMIT ?",
+                (scope, self._max_size)
+            ).fetchall()
+        except sqlite3.Error as e:
+            logger.warning("Failed to load semantic cache for scope %s: %s", scope, e)
+            return cache
+
+        for key, template, sql_template, sql, explanation, confidence, embedding in reversed(rows):
+            entry = (sql, explanation, confidence)
+            cache.exact[key] = entry
+            if template and sql_template:
+                cache.templates[template] = (sql_template, explanation, confidence)
+            if embedding and np is not None:
+                cache.vectors.append(np.frombuffer(embedding, dtype=np.float32).tolist())
+                cache.vector_sql.append(entry)
+        return cache
+
+    def _persist(self, scope: str, key: bytes, template: Optional[str], sql_template: Optional[str],
+                 entry: Tuple[str, str, float], vector: Optional[List[float]]):
+        if self._conn is None:
+            return
+        blob = np.asarray(vector, dtype=np.float32).tobytes() if vector is not None and np is not None else None
+        try:
+            with self._conn as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO sql_cache VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (scope, key, template, sql_template, *entry, blob)
+                )
+                # Keep the newest max_size rows per scope, matching the in-memory bound
+                conn.execute(
+                    "DELETE FROM sql_cache WHERE scope = ? AND rowid NOT IN "
+                    "(SELECT rowid FROM sql_cache WHERE scope = ? ORDER BY rowid DESC LIMIT ?)",
+                    (scope, scope, self._max_size)
+                )
+        except sqlite3.Error as e:
+            logger.warning("Failed to persist semantic cache entry: %s", e)
+
+    # Tiers
+    def _match_template(self, scope: str, query: str) -> Optional[Tuple[str, str, float]]:
+        """
+        Fill a cached SQL template with the query's literals.
+        The result is new SQL, so it is validated before being returned.
+        """
+        template, params = _parameterize(query)
+        if not params or any(_UNSAFE_PARAM_RE.search(p) for p in params):
+            return None
+        with self._lock:
+            templates = self._load_scope(scope).templates
+            cached = templates.get(template)
+            if cached is not None:
+                templates.move_to_end(template)
+        if cached is None:
+            return None
+        sql_template, explanation, confidence = cached
+
+        parts: List[str] = []
+        pos = 0
+        for m in _PLACEHOLDER_RE.finditer(sql_template):
+            value = params[int(m.group(1))]
+            quoted = m.start() > 0 and sql_template[m.start() - 1] in "'\""
+            if not quoted and not _BARE_VALUE_RE.fullmatch(value):
+                return None
+            parts.append(sql_template[pos:m.start()])
+            parts.append(value)
+            pos = m.end()
+        parts.append(sql_template[pos:])
+        sql = "".join(parts)
+
+        try:
+            validate_sql(sql, scope.split(":", 1)[0])
+        except ValueError as e:
+            logger.warning("Discarding template cache hit that failed validation: %s", e)
+            return None
+        return sql, explanation, confidence
+
+    def _match_semantic(self, scope: str, query: str) -> Tuple[Optional[Tuple[str, str, float]], Optional[List[float]]]:
+        if np is None:
+            return None, None
+        q_vec = embed_query(query)
+        if q_vec is None:
+            return None, None
+
+        with self._lock:
+            cache = self._load_scope(scope)
+            if not cache.vectors:
+                return None, q_vec
+            if cache.matrix is None:
+                mat = np.asarray(cache.vectors, dtype=np.float32)
+                mat /= np.linalg.norm(mat, axis=1, keepdims=True) + 1e-9
+                cache.matrix = mat
+            mat = cache.matrix
+            entries = cache.vector_sql
+
+        q = np.asarray(q_vec, dtype=np.float32)
+        q /= np.linalg.norm(q) + 1e-9
+        sims = np.dot(mat, q)
+        best = int(np.argmax(sims))
+        if sims[best] >= self._threshold:
+            return entries[best], q_vec
+        return None, q_vec
+
+    async def lookup(self, scope: str, query: str) -> Tuple[Optional[SQLGenerationResponse], Optional[List[float]]]:
+        """
+        Look up cached SQL for a query.
+        Returns: (cached response or None, query embedding for a later store)
+        """
+        t0 = time.perf_counter()
+        key = _query_key(scope, query)
+
+        with self._lock:
+            cache = self._load_scope(scope)
+            entry = cache.exact.get(key)
+            if entry is not None:
+                cache.exact.move_to_end(key)
+                self._hits["exact"] += 1
+        if entry is not None:
+            return self._to_response(entry, t0), None
+
+        async def template_tier():
+            return self._match_template(scope, query)
+
+        template_hit, (semantic_hit, q_vec) = await asyncio.gather(
+            template_tier(),
+            asyncio.to_thread(self._match_semantic, scope, query)
+        )
+
+        hit, tier = (template_hit, "template") if template_hit is not None else (semantic_hit, "semantic")
+        with self._lock:
+            if hit is not None:
+                self._hits[tier] += 1
+            else:
+                self._misses += 1
+        if hit is not None:
+            return self._to_response(hit, t0), q_vec
+        return None, q_vec
+
+    @staticmethod
+    def key(scope: str, query: str) -> bytes:
+        """Exact-match key; queries with equal keys share one cache entry"""
+        return _query_key(scope, query)
+
+    def store(self, scope: str, query: str, response: SQLGenerationResponse,
+              q_vec: Optional[List[float]] = None):
+        """Store generated SQL for a query in all applicable tiers"""
+        key = _query_key(scope, query)
+        entry = (response.sql, response.explanation, response.confidence)
+        template, params = _parameterize(query)
+        sql_template = _sql_template(response.sql, params)
+
+        with self._lock:
+            cache = self._load_scope(scope)
+            cache.exact[key] = entry
+            cache.exact.move_to_end(key)
+            if sql_template is not None:
+                cache.templates[template] = (sql_template, *entry[1:])
+                cache.templates.move_to_end(template)
+            while len(cache.exact) > self._max_size:
+                cache.exact.popitem(last=False)
+            while len(cache.templates) > self._max_size:
+                cache.templates.popitem(last=False)
+            if q_vec is not None and np is not None:
+                cache.vectors.append(q_vec)
+                cache.vector_sql.append(entry)
+                if len(cache.vectors) > self._max_size:
+                    del cache.vectors[0], cache.vector_sql[0]
+                cache.matrix = None
+
+            self._persist(scope, key, template if sql_template else None, sql_template, entry, q_vec)
+
+    def clear(self, scope: Optional[str] = None) -> int:
+        """Clear cached SQL, optionally for a single scope"""
+        with self._lock:
+            if scope is None:
+                count = sum(len(c.exact) for c in self._scopes.values())
+                self._scopes.clear()
+            else:
+                cache = self._scopes.pop(scope, None)
+                count = len(cache.exact) if cache else 0
+
+            if self._conn is not None:
+                try:
+                    with self._conn as conn:
+                        if scope is None:
+                            conn.execute("DELETE FROM sql_cache")
+                        else:
+                            conn.execute("DELETE FROM sql_cache WHERE scope = ?", (scope,))
+                except sqlite3.Error as e:
+                    logger.warning("Failed to clear persisted semantic cache: %s", e)
+        return count
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get hit/miss counters per tier"""
+        with self._lock:
+            return {**{f"{tier}_hits": n for tier, n in self._hits.items()}, "misses": self._misses}
+
+    @staticmethod
+    def _to_response(entry: Tuple[str, str, float], t0: float) -> SQLGenerationResponse:
+        sql, explanation, confidence = entry
+        return SQLGenerationResponse(
+            sql=sql,
+            explanation=explanation,
+            confidence=confidence,
+            execution_time=time.perf_counter() - t0
+        )
+
+
+# Global semantic cache instance
+semantic_cache = SemanticSQLCache(
+    db_path=os.path.join(settings.DATA_DIR, settings.SEMANTIC_CACHE_DB_PATH) if settings.SEMANTIC_CACHE_DB_PATH else None,
+    max_size=settings.SEMANTIC_CACHE_SIZE,
+    similarity_threshold=settings.SEMANTIC_CACHE_THRESHOLD
+)
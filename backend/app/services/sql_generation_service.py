@@ -1,194 +1,369 @@
 from __future__ import annotations
+import asyncio
+import hashlib
+import json
 import os
 import re
+import threading
 import time
-from typing import Dict, List, Optional, Tuple
+from contextlib import aclosing
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
 
+import httpx
+import openai
 from langchain_core.output_parsers import StrOutputParser
-from langchain_core.prompts import ChatPromptTemplate, SystemMessagePromptTemplate, HumanMessagePromptTemplate
+from langchain_core.messages import SystemMessage
+from langchain_core.prompts import ChatPromptTemplate, HumanMessagePromptTemplate
 
 from langchain_openai import ChatOpenAI
 
 from ..models.responses import SQLGenerationResponse
+from ..models.schema import DatabaseSchema, TableInfo
 from ..services.database_service import database_service
-from ..utils.retrieval import select_relevant_tables, build_schema_snippet, create_schema_context
-from ..core.prompts import SYSTEM_PROMPT, make_user_prompt
-from ..utils.schema_analyzer import introspect_schema
+from ..services.schema_service import schema_service
+from ..utils.retrieval import select_relevant_tables, build_schema_snippet, create_schema_context, get_related_tables_for_query
+from ..core.compiler import compile_ast
+from ..core.prompts import SYSTEM_PROMPT, AST_SYSTEM_PROMPT, AST_BATCH_SYSTEM_PROMPT, make_user_prompt, make_batch_user_prompt
+from ..utils.config import settings
+from ..utils.schema_analyzer import generate_schema_hash
 
 
 # Tunables
 _MAX_TOKENS = int(os.getenv("GEN_MAX_TOKENS", "256"))
 _TEMPERATURE = float(os.getenv("GEN_TEMPERATURE", "0.0"))
 _TOP_K_TABLES = int(os.getenv("GEN_TOPK_TABLES", "8"))
+# Ask the model for a JSON query AST and compile it instead of free-form SQL
+_AST_MODE = os.getenv("GEN_AST_MODE", "0") == "1"
+_MAX_BATCH_SIZE = int(os.getenv("GEN_MAX_BATCH_SIZE", "20"))
+# Stream completions and stop reading at the end of the first SQL statement
+_STREAM = os.getenv("GEN_STREAM", "1") == "1"
 
 # Model
 _MODEL = os.getenv("GEN_MODEL_NAME", "gpt-4o-mini")  # pick a small, fast model for latency <2s
 
+# Concurrent LLM calls are capped so bursts queue here instead of hitting
+# provider rate limits. HTTP clients are shared so connections are reused.
+_LLM_SEM = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+_HTTP_LIMITS = httpx.Limits(
+    max_connections=settings.LLM_MAX_CONCURRENCY,
+    max_keepalive_connections=settings.LLM_MAX_CONCURRENCY
+)
+_http_client = httpx.Client(limits=_HTTP_LIMITS)
+_async_http_client = httpx.AsyncClient(limits=_HTTP_LIMITS)
+_llm: Optional[ChatOpenAI] = None
+_llm_lock = threading.Lock()
+# Prompt -> model -> text chains by (system prompt, max_tokens); built once and reused
+_chains: Dict[Tuple[str, Optional[int]], Any] = {}
 
 def _strip_markdown(sql: str) -> str:
     """Remove markdown code blocks from SQL output"""
     s = sql.strip()
-    s = re.sub(r"^```[a-zA-Z]*\s*", "", s)
-    s = re.sub(r"\s*```$", "", s)
+    if s.startswith("```"):
+        # Drop the fence and its language tag (```sql)
+        i = 3
+        while i < len(s) and s[i].isascii() and s[i].isalpha():
+            i += 1
+        s = s[i:]
+    if s.endswith("```"):
+        s = s[:-3]
     return s.strip()
 
 
 def _single_statement_only(sql: str) -> str:
     """Extract first non-empty SQL statement"""
     # naive: split by semicolon; keep the first non-empty segment
-    parts = [p.strip() for p in sql.split(";") if p.strip()]
-    if not parts:
-        return sql.strip()
-    return parts[0]
+    start = 0
+    while True:
+        end = sql.find(";", start)
+        segment = (sql[start:] if end == -1 else sql[start:end]).strip()
+        if segment:
+            return segment
+        if end == -1:
+            return sql.strip()
+        start = end + 1
+
+
+def _sql_from_ast(raw: str, dialect: str) -> str:
+    """Parse the model's JSON query AST and compile it to SQL"""
+    try:
+        ast = json.loads(_strip_markdown(raw))
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Model returned invalid query AST: {str(e)}")
+    return compile_ast(ast, dialect)
+
+
+@lru_cache(maxsize=256)
+def _table_prefix_re(used_tables: Tuple[str, ...]) -> re.Pattern:
+    """One alternation matching "<table>." for any of the (lowercased) tables"""
+    return re.compile(r"\b(?:" + "|".join(re.escape(t) for t in used_tables) + r")\.")
 
 
-def _estimate_confidence(raw: str, used_tables: List[str]) -> float:
-    """Estimate confidence in generated SQL based on heuristics"""
+def _estimate_confidence(raw: str, used_tables: Tuple[str, ...]) -> float:
+    """Estimate confidence in generated SQL based on heuristics (used_tables lowercased)"""
+    r = raw.lower()
     score = 0.5
     # heuristic bumps
-    if raw.lower().startswith("select"):
+    if r.startswith("select"):
         score += 0.2
-    if any(t + "." in raw.lower() for t in [t.lower() for t in used_tables]):
+    # Any used table appearing as a qualifier ("invoice.total")
+    if used_tables and _table_prefix_re(used_tables).search(r):
         score += 0.15
-    if " join " in raw.lower():
+    if " join " in r:
         score += 0.05
     score = max(0.0, min(1.0, score))
     return round(score, 2)
 
 
-def generate_sql(nl_query: str) -> SQLGenerationResponse:
+def get_cache_scope(examples: Optional[List[Dict[str, str]]] = None) -> str:
     """
-    Main entry: natural language query -> SQL response
+    Cache scope for generated SQL: dialect + schema hash (+ examples hash).
+    Generated SQL is only reusable against the same schema and examples.
     """
-    t0 = time.perf_counter()
+    current_db = database_service.get_current_database()
+    if current_db is None:
+        raise ValueError("No active database connection")
+
+    schema = schema_service.load_schema(current_db._engine)
+    scope = f"{schema.database_type}:{generate_schema_hash(schema)}"
+    if examples:
+        examples_key = "\x00".join(f"{e.get('query', '')}\x01{e.get('sql', '')}" for e in examples)
+        scope += ":" + hashlib.blake2b(examples_key.encode("utf-8"), digest_size=8, usedforsecurity=False).hexdigest()
+    return scope
+
 
+def _prepare_prompt(nl_query: str, examples: Optional[List[Dict[str, str]]] = None) -> Tuple[DatabaseSchema, Tuple[str, ...], str]:
+    """
+    Introspect the current database and build the user prompt.
+    Returns: (schema, lowercased names of tables used as context, user prompt)
+    """
     # Get current database connection
     current_db = database_service.get_current_database()
     if current_db is None:
         raise ValueError("No active database connection")
 
-    # Get database engine
-    engine = current_db._engine
-    
-    # Introspect schema
-    schema = introspect_schema(engine)
-    
+    # Introspect schema (cached per database until disconnect)
+    schema = schema_service.load_schema(current_db._engine)
+
     # Retrieval: pick top-K relevant tables
     tables, score_map = select_relevant_tables(schema, nl_query, top_k=_TOP_K_TABLES)
-    used_tables = [t.name for t in tables]
-    
+    used_tables = tuple(t.name.lower() for t in tables)
+
     # Create schema context
-    schema_text = create_schema_context(schema, nl_query, include_relationships=True, max_tables=_TOP_K_TABLES)
+    schema_text = create_schema_context(schema, nl_query, include_relationships=True, max_tables=_TOP_K_TABLES,
+                                        relevant_tables=tables)
+
+    user_p = make_user_prompt(schema.database_type, nl_query, schema_text, examples=_format_examples(examples), ast=_AST_MODE)
+    return schema, used_tables, user_p
 
-    # Prompts
-    sys_p = SYSTEM_PROMPT
-    user_p = make_user_prompt(schema.database_type, nl_query, schema_text, examples=None)
 
+def _prepare_batch_prompt(nl_queries: List[str], examples: Optional[List[Dict[str, str]]] = None) -> Tuple[DatabaseSchema, Tuple[str, ...], str]:
+    """
+    Build one user prompt covering several queries.
+    The schema context is the union of the tables each query would use on its own.
+    Returns: (schema, lowercased names of tables used as context, user prompt)
+    """
+    current_db = database_service.get_current_database()
+    if current_db is None:
+        raise ValueError("No active database connection")
+
+    schema = schema_service.load_schema(current_db._engine)
+
+    tables: Dict[str, TableInfo] = {}
+    for nl_query in nl_queries:
+        for t in get_related_tables_for_query(schema, nl_query, include_relationships=True, max_tables=_TOP_K_TABLES):
+            tables.setdefault(t.name, t)
+    used_tables = tuple(name.lower() for name in tables)
+
+    schema_text = f"Database: {schema.database_name} ({schema.database_type})\n"
+    schema_text += f"Total tables: {schema.total_tables}\n"
+    schema_text += f"Relevant tables ({len(tables)}):\n"
+    schema_text += build_schema_snippet(list(tables.values()), schema)
+
+    user_p = make_batch_user_prompt(schema.database_type, nl_queries, schema_text, examples=_format_examples(examples))
+    return schema, used_tables, user_p
+
+
+def _format_examples(examples: Optional[List[Dict[str, str]]]) -> Optional[str]:
+    """Format example query/SQL pairs for the prompt"""
+    if not examples:
+        return None
+    examples_text = ""
+    for i, example in enumerate(examples, 1):
+        examples_text += f"Example {i}:\n"
+        examples_text += f"Query: {example.get('query', '')}\n"
+        examples_text += f"SQL: {example.get('sql', '')}\n\n"
+    return examples_text
+
+
+def _get_llm() -> ChatOpenAI:
+    """Shared chat model backed by the pooled HTTP clients"""
+    global _llm
+    if _llm is None:
+        with _llm_lock:
+            if _llm is None:
+                api_key = os.getenv("OPENAI_API_KEY") or settings.OPENAI_API_KEY
+                _llm = ChatOpenAI(
+                    model=_MODEL,
+                    temperature=_TEMPERATURE,
+                    max_tokens=_MAX_TOKENS,
+                    openai_api_key=api_key,
+                    client=openai.OpenAI(api_key=api_key, http_client=_http_client).chat.completions,
+                    async_client=openai.AsyncOpenAI(api_key=api_key, http_client=_async_http_client).chat.completions,
+                )
+    return _llm
+
+
+def _build_chain(system_prompt: Optional[str] = None, max_tokens: Optional[int] = None):
+    """Prompt -> model -> text chain, shared by every request with the same shape"""
+    sys_p = system_prompt or (AST_SYSTEM_PROMPT if _AST_MODE else SYSTEM_PROMPT)
+    key = (sys_p, max_tokens)
+    chain = _chains.get(key)
+    if chain is not None:
+        return chain
+
+    # The system prompt is sent verbatim as the first message, so the prefix
+    # that provider-side prompt caching keys on stays identical across requests
     prompt = ChatPromptTemplate.from_messages([
-        SystemMessagePromptTemplate.from_template(sys_p),
+        SystemMessage(content=sys_p),
         HumanMessagePromptTemplate.from_template("{user}"),
     ])
 
-    chain = prompt | ChatOpenAI(
-        model=_MODEL,
-        temperature=_TEMPERATURE,
-        max_tokens=_MAX_TOKENS,
-    ) | StrOutputParser()
+    llm = _get_llm()
+    if max_tokens is not None:
+        llm = llm.bind(max_tokens=max_tokens)
+    return _chains.setdefault(key, prompt | llm | StrOutputParser())
 
-    try:
-        raw = chain.invoke({"user": user_p})
-    except Exception as e:
-        raise ValueError(f"SQL generation failed: {str(e)}")
 
-    # Post-process: no markdown, single statement
-    raw_sql = _single_statement_only(_strip_markdown(raw))
+def _finalize(raw: str, schema: DatabaseSchema, used_tables: Tuple[str, ...], t0: int,
+              examples: Optional[List[Dict[str, str]]] = None) -> SQLGenerationResponse:
+    """Post-process raw model output into a response"""
+    # Post-process: compile the AST, or strip markdown and keep a single statement
+    if _AST_MODE:
+        raw_sql = _sql_from_ast(raw, schema.database_type)
+    else:
+        raw_sql = _single_statement_only(_strip_markdown(raw))
+    return _build_response(raw_sql, schema, used_tables, t0, examples)
+
 
-    latency_ms = int((time.perf_counter() - t0) * 1000)
+def _build_response(raw_sql: str, schema: DatabaseSchema, used_tables: Tuple[str, ...], t0: int,
+                    examples: Optional[List[Dict[str, str]]] = None) -> SQLGenerationResponse:
+    latency_ms = (time.perf_counter_ns() - t0) // 1_000_000
     confidence = _estimate_confidence(raw_sql, used_tables)
 
+    explanation = f"Generated SQL using {len(used_tables)} relevant tables"
+    if examples:
+        explanation += f" and {len(examples)} examples"
+
     return SQLGenerationResponse(
         sql=raw_sql,
-        explanation=f"Generated SQL using {len(used_tables)} relevant tables",
+        explanation=explanation,
         confidence=confidence,
-        execution_time=latency_ms / 1000.0,
-        metadata={
-            "dialect": schema.database_type,
-            "tables_used": used_tables,
-            "model": _MODEL,
-            "top_k_tables": _TOP_K_TABLES,
-            "schema_tables_total": schema.total_tables
-        }
+        execution_time=latency_ms / 1000.0
     )
 
 
-def generate_sql_with_examples(nl_query: str, examples: List[Dict[str, str]]) -> SQLGenerationResponse:
-    """
-    Generate SQL with example queries for better context
-    """
-    t0 = time.perf_counter()
+def _ends_statement(text: str) -> bool:
+    """Whether text contains a ';' outside single-quoted string literals"""
+    in_literal = False
+    for ch in text:
+        if ch == "'":
+            in_literal = not in_literal
+        elif ch == ";" and not in_literal:
+            return True
+    return False
 
-    # Get current database connection
-    current_db = database_service.get_current_database()
-    if current_db is None:
-        raise ValueError("No active database connection")
 
-    # Get database engine
-    engine = current_db._engine
-    
-    # Introspect schema
-    schema = introspect_schema(engine)
-    
-    # Retrieval: pick top-K relevant tables
-    tables, score_map = select_relevant_tables(schema, nl_query, top_k=_TOP_K_TABLES)
-    used_tables = [t.name for t in tables]
-    
-    # Create schema context
-    schema_text = create_schema_context(schema, nl_query, include_relationships=True, max_tables=_TOP_K_TABLES)
+async def _ainvoke_raw(chain, user_p: str) -> str:
+    """
+    Run the chain for raw model output. When streaming, stop reading once the
+    first statement is complete; post-processing keeps only that statement.
+    """
+    if not _STREAM or _AST_MODE:
+        return await chain.ainvoke({"user": user_p})
+    chunks: List[str] = []
+    async with aclosing(chain.astream({"user": user_p})) as stream:
+        async for delta in stream:
+            chunks.append(delta)
+            if ";" in delta and _ends_statement("".join(chunks)):
+                break
+    return "".join(chunks)
+
+
+async def agenerate_sql(nl_query: str, examples: Optional[List[Dict[str, str]]] = None) -> SQLGenerationResponse:
+    """
+    Main entry: natural language query (plus optional examples) -> SQL response.
+    Waits for a free LLM slot instead of calling the model unbounded.
+    """
+    t0 = time.perf_counter_ns()
+    schema, used_tables, user_p = await asyncio.to_thread(_prepare_prompt, nl_query, examples)
 
-    # Format examples
-    examples_text = ""
-    for i, example in enumerate(examples, 1):
-        examples_text += f"Example {i}:\n"
-        examples_text += f"Query: {example.get('query', '')}\n"
-        examples_text += f"SQL: {example.get('sql', '')}\n\n"
+    try:
+        async with _LLM_SEM:
+            raw = await _ainvoke_raw(_build_chain(), user_p)
+    except Exception as e:
+        raise ValueError(f"SQL generation failed: {str(e)}")
 
-    # Prompts
-    sys_p = SYSTEM_PROMPT
-    user_p = make_user_prompt(schema.database_type, nl_query, schema_text, examples=examples_text)
+    return _finalize(raw, schema, used_tables, t0, examples)
 
-    prompt = ChatPromptTemplate.from_messages([
-        SystemMessagePromptTemplate.from_template(sys_p),
-        HumanMessagePromptTemplate.from_template("{user}"),
-    ])
 
-    chain = prompt | ChatOpenAI(
-        model=_MODEL,
-        temperature=_TEMPERATURE,
-        max_tokens=_MAX_TOKENS,
-    ) | StrOutputParser()
+async def stream_sql(nl_query: str, examples: Optional[List[Dict[str, str]]] = None) -> AsyncIterator[Union[str, SQLGenerationResponse]]:
+    """
+    Streaming variant of agenerate_sql: yields model output deltas as they
+    arrive, then the final SQLGenerationResponse built from the full output.
+    """
+    t0 = time.perf_counter_ns()
+    schema, used_tables, user_p = await asyncio.to_thread(_prepare_prompt, nl_query, examples)
 
+    chunks: List[str] = []
     try:
-        raw = chain.invoke({"user": user_p})
+        async with _LLM_SEM:
+            async for delta in _build_chain().astream({"user": user_p}):
+                if delta:
+                    chunks.append(delta)
+                    yield delta
     except Exception as e:
         raise ValueError(f"SQL generation failed: {str(e)}")
 
-    # Post-process: no markdown, single statement
-    raw_sql = _single_statement_only(_strip_markdown(raw))
+    yield _finalize("".join(chunks), schema, used_tables, t0, examples)
 
-    latency_ms = int((time.perf_counter() - t0) * 1000)
-    confidence = _estimate_confidence(raw_sql, used_tables)
 
-    return SQLGenerationResponse(
-        sql=raw_sql,
-        explanation=f"Generated SQL using {len(used_tables)} relevant tables and {len(examples)} examples",
-        confidence=confidence,
-        execution_time=latency_ms / 1000.0,
-        metadata={
-            "dialect": schema.database_type,
-            "tables_used": used_tables,
-            "model": _MODEL,
-            "top_k_tables": _TOP_K_TABLES,
-            "schema_tables_total": schema.total_tables,
-            "examples_used": len(examples)
-        }
-    ) 
\ No newline at end of file
+async def agenerate_sql_batch(nl_queries: List[str], examples: Optional[List[Dict[str, str]]] = None) -> List[Dict[str, Any]]:
+    """
+    Generate SQL for several queries sharing the same examples with one LLM call.
+    The model returns a JSON array of query ASTs that are compiled per query.
+    Returns one {"success", "error", "response"} dict per query, in order.
+    """
+    if len(nl_queries) > _MAX_BATCH_SIZE:
+        raise ValueError(f"Batch size {len(nl_queries)} exceeds the limit of {_MAX_BATCH_SIZE}")
+
+    t0 = time.perf_counter_ns()
+    schema, used_tables, user_p = await asyncio.to_thread(_prepare_batch_prompt, nl_queries, examples)
+    chain = _build_chain(AST_BATCH_SYSTEM_PROMPT, max_tokens=_MAX_TOKENS * len(nl_queries))
+
+    try:
+        async with _LLM_SEM:
+            raw = await chain.ainvoke({"user": user_p})
+    except Exception as e:
+        raise ValueError(f"SQL generation failed: {str(e)}")
+
+    try:
+        asts = json.loads(_strip_markdown(raw))
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Model returned invalid query AST batch: {str(e)}")
+    if not isinstance(asts, list) or len(asts) != len(nl_queries):
+        raise ValueError(f"Model returned {len(asts) if isinstance(asts, list) else 'no'} query ASTs for {len(nl_queries)} queries")
+
+    results: List[Dict[str, Any]] = []
+    for ast in asts:
+        try:
+            raw_sql = compile_ast(ast, schema.database_type)
+        except ValueError as e:
+            results.append({"success": False, "error": str(e), "response": None})
+            continue
+        results.append({
+            "success": True,
+            "error": None,
+            "response": _build_response(raw_sql, schema, used_tables, t0, examples)
+        })
+    return results
@@ -1,52 +0,0 @@
-# LangChain SQL generation
-from typing import Dict, Any, Optional
-import time
-
-class SQLService:
-    def __init__(self):
-        # TODO: Initialize LangChain components
-        pass
-    
-    async def generate_sql(self, natural_language_query: str, schema_context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        """Generate SQL from natural language query using LangChain"""
-        start_time = time.time()
-        
-        try:
-            # TODO: Implement LangChain SQL generation logic
-            # This would typically involve:
-            # 1. Creating a prompt with schema context
-            # 2. Using an LLM to generate SQL
-            # 3. Validating the generated SQL
-            
-            # Placeholder implementation
-            generated_sql = f"SELECT * FROM table WHERE condition = '{natural_language_query}'"
-            explanation = f"Generated SQL query for: {natural_language_query}"
-            confidence = 0.85
-            
-            execution_time = time.time() - start_time
-            
-            return {
-                "sql": generated_sql,
-                "explanation": explanation,
-                "confidence": confidence,
-                "execution_time": execution_time
-            }
-        except Exception as e:
-            raise Exception(f"Failed to generate SQL: {str(e)}")
-    
-    async def validate_sql(self, sql_query: str) -> Dict[str, Any]:
-        """Validate generated SQL query"""
-        try:
-            # TODO: Implement SQL validation logic
-            # This could involve:
-            # 1. Syntax checking
-            # 2. Semantic validation
-            # 3. Execution plan analysis
-            
-            return {
-                "valid": True,
-                "message": "SQL query is valid",
-                "suggestions": []
-            }
-        except Exception as e:
-            raise Exception(f"Failed to validate SQL: {str(e)}") 
\ No newline at end of file
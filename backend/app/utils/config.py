@@ -1,3 +1,4 @@
+from pathlib import Path
 from pydantic_settings import BaseSettings
 from typing import List
 
@@ -8,6 +9,18 @@ class Settings(BaseSettings):
     # Database Configuration (SQLite Only)
     DB_TYPE: str = "sqlite"
     SQLITE_DB_PATH: str = "../database/sample_data/chinook.db"
+    SQLITE_WAL: bool = True
+    
+    # Connection pool
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_RECYCLE: int = 3600
+    
+    # Schema response cache (stale entries are served while refreshing)
+    SCHEMA_RESPONSE_TTL_SECONDS: int = 300
+    
+    # Files written by the app; relative data paths below resolve against it
+    DATA_DIR: str = str(Path(__file__).resolve().parents[2] / "data")
     
     # Application Configuration
     API_PORT: int = 8000
@@ -15,6 +28,14 @@ class Settings(BaseSettings):
     CORS_ORIGINS: List[str] = ["http://localhost:3000"]
     LOG_LEVEL: str = "INFO"
     
+    # LLM client (concurrent requests and pooled HTTP connections)
+    LLM_MAX_CONCURRENCY: int = 8
+    
+    # Semantic SQL cache (relative to DATA_DIR; empty path keeps the cache in memory only)
+    SEMANTIC_CACHE_DB_PATH: str = "semantic_cache.db"
+    SEMANTIC_CACHE_SIZE: int = 1024
+    SEMANTIC_CACHE_THRESHOLD: float = 0.92
+    
     class Config:
         env_file = ".env"
 
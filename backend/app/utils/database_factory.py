@@ -1,9 +1,48 @@
 from langchain_community.utilities import SQLDatabase
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.pool import QueuePool
 import os
-from typing import Optional, Tuple
-from utils.config import settings
+from threading import Lock
+from typing import Dict, Optional, Tuple
+from app.utils.config import settings
+
+
+# One pooled engine per database file, shared by every connection request
+_engines: Dict[str, Engine] = {}
+_engines_lock = Lock()
+
+
+def _enable_wal(dbapi_connection, connection_record):
+    """Switch SQLite to WAL so concurrent readers don't block each other"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.close()
+
+
+def get_engine(sqlite_uri: str) -> Engine:
+    """Get (or create) the pooled engine for a SQLite URI"""
+    engine = _engines.get(sqlite_uri)
+    if engine is not None:
+        return engine
+    
+    with _engines_lock:
+        engine = _engines.get(sqlite_uri)
+        if engine is None:
+            engine = create_engine(
+                sqlite_uri,
+                poolclass=QueuePool,
+                pool_size=settings.DB_POOL_SIZE,
+                max_overflow=settings.DB_MAX_OVERFLOW,
+                pool_pre_ping=True,
+                pool_recycle=settings.DB_POOL_RECYCLE,
+                connect_args={"check_same_thread": False},
+            )
+            if settings.SQLITE_WAL:
+                event.listen(engine, "connect", _enable_wal)
+            _engines[sqlite_uri] = engine
+        return engine
 
 
 class DatabaseFactory:
@@ -24,20 +63,19 @@ class DatabaseFactory:
             sqlite_uri = f"sqlite:///{db_path}"
             
             # Test basic connection first
-            engine = create_engine(sqlite_uri)
+            engine = get_engine(sqlite_uri)
             with engine.connect() as conn:
                 # Test if it's a valid SQLite database
                 result = conn.execute(text("SELECT name FROM sqlite_master WHERE type='table' LIMIT 1;"))
-                result.fetchone()  # This will fail if not a valid SQLite DB
-            
-            # Create LangChain SQLDatabase instance
-            db = SQLDatabase.from_uri(sqlite_uri)
+                has_tables = result.fetchone() is not None  # This will fail if not a valid SQLite DB
             
             # Validate it has tables
-            tables = db.get_usable_table_names()
-            if not tables:
+            if not has_tables:
                 return None, "Database contains no tables"
             
+            # Create LangChain SQLDatabase instance on the pooled engine
+            db = SQLDatabase(engine)
+            
             return db, None
             
         except SQLAlchemyError as e:
@@ -50,13 +88,18 @@ class DatabaseFactory:
         """Get default SQLite connection (Chinook database)"""
         return DatabaseFactory.create_sqlite_connection(settings.SQLITE_DB_PATH)
     
+    @staticmethod
+    def count_tables(db: SQLDatabase) -> int:
+        """Number of user tables, counted in the catalog without reflecting them"""
+        with db._engine.connect() as conn:
+            return conn.execute(text(
+                "SELECT count(*) FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite\\_%' ESCAPE '\\'"
+            )).scalar()
+    
     @staticmethod
     def test_connection(db: SQLDatabase) -> Tuple[bool, Optional[str]]:
         """Test if database connection is working"""
         try:
-            # Try to get table names
-            tables = db.get_usable_table_names()
-            
             # Try a simple query
             result = db.run("SELECT 1 as test_query;")
             
@@ -0,0 +1,133 @@
+"""
+Array kernels for relationship graphs.
+
+The graph is CSR-encoded: neighbours of node i are indices[indptr[i]:indptr[i + 1]].
+Kernels are compiled with numba when it is installed and run as plain Python
+otherwise; both paths return the same results.
+"""
+from __future__ import annotations
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # kernels run uncompiled without numba
+    njit = None
+
+
+def _jit(func):
+    return njit(cache=True, nogil=True)(func) if njit is not None else func
+
+
+@_jit
+def bidirectional_bfs_path(indptr, indices, start, end, max_steps):
+    """
+    Shortest path from start to end over an undirected CSR graph, searching
+    from both ends and always expanding the smaller frontier by one level.
+    Paths have at most max_steps edges.
+    Returns node ids along the path, or an empty array when unreachable.
+    """
+    n = indptr.shape[0] - 1
+    if start == end:
+        path = np.empty(1, dtype=np.int32)
+        path[0] = start
+        return path
+
+    # parent[0] / dist[0] belong to the forward search, [1] to the backward one
+    parent = np.full((2, n), -1, dtype=np.int32)
+    dist = np.zeros((2, n), dtype=np.int32)
+    frontier = np.empty((2, n), dtype=np.int32)
+    size = np.zeros(2, dtype=np.int32)
+    level = np.zeros(2, dtype=np.int32)
+    parent[0, start] = start
+    parent[1, end] = end
+    frontier[0, 0] = start
+    frontier[1, 0] = end
+    size[0] = 1
+    size[1] = 1
+    meet_a = -1
+    meet_b = -1
+    side = 0
+
+    while size[0] > 0 and size[1] > 0 and level[0] + level[1] < max_steps:
+        side = 0 if size[0] <= size[1] else 1
+        other = 1 - side
+        next_frontier = np.empty(n, dtype=np.int32)
+        next_size = 0
+        for f in range(size[side]):
+            node = frontier[side, f]
+            for k in range(indptr[node], indptr[node + 1]):
+                nb = indices[k]
+                if parent[other, nb] != -1:
+                    meet_a = node
+                    meet_b = nb
+                    break
+                if parent[side, nb] != -1:
+                    continue
+                parent[side, nb] = node
+                dist[side, nb] = dist[side, node] + 1
+                next_frontier[next_size] = nb
+                next_size += 1
+            if meet_a != -1:
+                break
+        if meet_a != -1:
+            break
+        frontier[side, :next_size] = next_frontier[:next_size]
+        size[side] = next_size
+        level[side] += 1
+
+    if meet_a == -1:
+        return np.empty(0, dtype=np.int32)
+
+    # meet_a was reached by `side`, meet_b by the other search
+    if side == 0:
+        fwd_node, bwd_node = meet_a, meet_b
+    else:
+        fwd_node, bwd_node = meet_b, meet_a
+    fwd_len = dist[0, fwd_node]
+    bwd_len = dist[1, bwd_node]
+    path = np.empty(fwd_len + bwd_len + 2, dtype=np.int32)
+    node = fwd_node
+    for i in range(fwd_len, -1, -1):
+        path[i] = node
+        node = parent[0, node]
+    node = bwd_node
+    for i in range(fwd_len + 1, fwd_len + bwd_len + 2):
+        path[i] = node
+        node = parent[1, node]
+    return path
+
+
+def build_csr(nodes: List[str], edges: Iterable[Tuple[str, str]], directed: bool = False) -> Tuple[np.ndarray, np.ndarray, Dict[str, int]]:
+    """
+    Encode a graph as CSR arrays.
+    Returns: (indptr, indices, node name -> id)
+    """
+    node_ids = {name: i for i, name in enumerate(nodes)}
+    src: List[int] = []
+    dst: List[int] = []
+    for a, b in edges:
+        ia, ib = node_ids[a], node_ids[b]
+        src.append(ia)
+        dst.append(ib)
+        if not directed:
+            src.append(ib)
+            dst.append(ia)
+
+    src_arr = np.asarray(src, dtype=np.int32)
+    dst_arr = np.asarray(dst, dtype=np.int32)
+    order = np.argsort(src_arr, kind="stable")
+    indices = dst_arr[order]
+    indptr = np.zeros(len(nodes) + 1, dtype=np.int32)
+    np.cumsum(np.bincount(src_arr, minlength=len(nodes)), out=indptr[1:])
+    return indptr, indices, node_ids
+
+
+def warmup():
+    """
+    Compile the kernels on a tiny graph so the first request doesn't pay JIT latency.
+    Called once at app startup rather than on import.
+    """
+    indptr, indices, _ = build_csr(["a", "b"], [("a", "b")])
+    bidirectional_bfs_path(indptr, indices, 0, 1, 4)
@@ -1,28 +1,41 @@
 from __future__ import annotations
+import hashlib
 import math
 import os
 import re
-from typing import Dict, List, Tuple
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
 
 from ..models.schema import DatabaseSchema, TableInfo
 
+try:
+    import numpy as np
+except ImportError:  # cosine scores fall back to pure Python
+    np = None
+
 # Optional embeddings (if OPENAI_API_KEY is set). Fallback to keyword only.
+# The client is created on first use, keeping it off the import path.
 USE_EMBEDDINGS = bool(os.getenv("OPENAI_API_KEY"))
+_emb = None
+_emb_lock = threading.Lock()
+
+# Query embeddings run here while tables are scored locally
+_embed_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="embed") if USE_EMBEDDINGS else None
 
-try:
-    if USE_EMBEDDINGS:
-        from langchain_openai import OpenAIEmbeddings
-        _emb = OpenAIEmbeddings()
-    else:
-        _emb = None
-except Exception:
-    _emb = None
-    USE_EMBEDDINGS = False
+
+_TOKEN_RE = re.compile(r"[a-z0-9_]+")
+
+# Table-text embeddings by content hash; tables only need re-embedding when
+# their name or columns change
+_EMB_CACHE_SIZE = 4096
+_EMB_CACHE: Dict[str, List[float]] = {}
+_emb_cache_lock = threading.Lock()
 
 
 def _tokenize(s: str) -> List[str]:
     """Tokenize text into lowercase alphanumeric tokens"""
-    return re.findall(r"[a-z0-9_]+", s.lower())
+    return _TOKEN_RE.findall(s.lower())
 
 
 def _table_keywords(t: TableInfo) -> List[str]:
@@ -39,44 +52,102 @@ def _table_keywords(t: TableInfo) -> List[str]:
     return list(dict.fromkeys(toks))  # dedupe, preserve order
 
 
-def _keyword_score(query: str, table: TableInfo) -> float:
-    """Calculate keyword similarity score between query and table"""
-    q_toks = set(_tokenize(query))
-    t_toks = set(_table_keywords(table))
-    if not q_toks or not t_toks:
-        return 0.0
+def _table_tokens(table: TableInfo) -> Tuple[FrozenSet[str], float]:
+    """
+    Keyword set of a table and the square root of its size, computed once per
+    TableInfo and reused across queries.
+    """
+    cached = table._keyword_tokens
+    if cached is None:
+        toks = frozenset(_table_keywords(table))
+        cached = table._keyword_tokens = (toks, math.sqrt(len(toks)))
+    return cached
+
+
+def _keyword_score(q_toks: FrozenSet[str], q_norm: float, table: TableInfo) -> float:
+    """Calculate keyword similarity score between query tokens and a table"""
+    t_toks, t_norm = _table_tokens(table)
     inter = len(q_toks & t_toks)
-    return inter / math.sqrt(len(q_toks) * len(t_toks))
+    if not inter:
+        return 0.0
+    return inter / (q_norm * t_norm)
+
+
+def _get_emb():
+    """Shared embeddings client, or None when embeddings are unavailable"""
+    global _emb, USE_EMBEDDINGS
+    if _emb is None and USE_EMBEDDINGS:
+        with _emb_lock:
+            if _emb is None and USE_EMBEDDINGS:
+                try:
+                    from langchain_openai import OpenAIEmbeddings
+                    _emb = OpenAIEmbeddings()
+                except Exception:
+                    USE_EMBEDDINGS = False
+    return _emb
 
 
 def _embed(texts: List[str]) -> List[List[float]]:
-    """Embed text using OpenAI embeddings if available"""
-    if not _emb:
+    """Embed text using OpenAI embeddings if available; only uncached texts are sent"""
+    emb = _get_emb()
+    if not emb:
         return []
+    keys = [hashlib.blake2b(t.encode("utf-8"), digest_size=16, usedforsecurity=False).hexdigest() for t in texts]
+    with _emb_cache_lock:
+        found = {k: _EMB_CACHE[k] for k in keys if k in _EMB_CACHE}
+    misses = {k: t for k, t in zip(keys, texts) if k not in found}
+    if misses:
+        # The embedding call runs unlocked; only cache reads and writes are guarded
+        try:
+            vecs = emb.embed_documents(list(misses.values()))  # returns List[List[float]]
+        except Exception:
+            return []
+        with _emb_cache_lock:
+            for k, vec in zip(misses, vecs):
+                found[k] = vec
+                if k not in _EMB_CACHE and len(_EMB_CACHE) >= _EMB_CACHE_SIZE:
+                    _EMB_CACHE.pop(next(iter(_EMB_CACHE)))
+                _EMB_CACHE[k] = vec
+    return [found[k] for k in keys]
+
+
+def embed_query(text: str) -> Optional[List[float]]:
+    """Embed a single query if embeddings are available"""
+    emb = _get_emb()
+    if not emb:
+        return None
     try:
-        vecs = _emb.embed_documents(texts)  # returns List[List[float]]
-        return vecs
+        return emb.embed_query(text)
     except Exception:
-        return []
+        return None
 
 
 def _cosine(a: List[float], b: List[float]) -> float:
     """Calculate cosine similarity between two vectors"""
-    try:
-        import numpy as np
+    if np is not None:
         va = np.array(a)
         vb = np.array(b)
         denom = (np.linalg.norm(va) * np.linalg.norm(vb)) or 1e-9
         return float(np.dot(va, vb) / denom)
-    except ImportError:
-        # Fallback if numpy not available
-        if len(a) != len(b):
-            return 0.0
-        dot_product = sum(x * y for x, y in zip(a, b))
-        norm_a = math.sqrt(sum(x * x for x in a))
-        norm_b = math.sqrt(sum(x * x for x in b))
-        denom = norm_a * norm_b or 1e-9
-        return dot_product / denom
+    # Fallback if numpy not available
+    if len(a) != len(b):
+        return 0.0
+    dot_product = sum(x * y for x, y in zip(a, b))
+    norm_a = math.sqrt(sum(x * x for x in a))
+    norm_b = math.sqrt(sum(x * x for x in b))
+    denom = norm_a * norm_b or 1e-9
+    return dot_product / denom
+
+
+def _cosine_scores(vecs: List[List[float]], q_vec: List[float]) -> List[float]:
+    """Cosine similarity of each vector to the query, as one matrix-vector product"""
+    if np is None:
+        return [_cosine(v, q_vec) for v in vecs]
+    m = np.asarray(vecs, dtype=np.float32)
+    m /= np.linalg.norm(m, axis=1, keepdims=True) + 1e-9
+    q = np.asarray(q_vec, dtype=np.float32)
+    q /= np.linalg.norm(q) + 1e-9
+    return (m @ q).tolist()
 
 
 def select_relevant_tables(
@@ -88,11 +159,16 @@ def select_relevant_tables(
     Rank tables by (keyword + optional embedding) and return top_k.
     Returns: (tables_sorted, score_map)
     """
+    # Start the query embedding round-trip before the local scoring work
+    q_future = _embed_pool.submit(embed_query, nl_query) if USE_EMBEDDINGS else None
+
     # Baseline: keyword scores
-    kw_scores: Dict[str, float] = {t.name: _keyword_score(nl_query, t) for t in schema.tables}
+    q_toks = frozenset(_tokenize(nl_query))
+    q_norm = math.sqrt(len(q_toks))
+    kw_scores: Dict[str, float] = {t.name: _keyword_score(q_toks, q_norm, t) for t in schema.tables}
 
     # Embedding: combine with keyword score
-    if USE_EMBEDDINGS and _emb:
+    if q_future is not None:
         table_texts = []
         names = []
         for t in schema.tables:
@@ -101,8 +177,12 @@ def select_relevant_tables(
             table_texts.append(f"{t.name}: {cols}")
         try:
             tbl_vecs = _embed(table_texts)
-            q_vec = _emb.embed_query(nl_query)
-            emb_scores = {names[i]: _cosine(tbl_vecs[i], q_vec) for i in range(len(names))}
+            if len(tbl_vecs) != len(names):
+                raise ValueError("table embeddings unavailable")
+            q_vec = q_future.result()
+            if q_vec is None:
+                raise ValueError("query embedding unavailable")
+            emb_scores = dict(zip(names, _cosine_scores(tbl_vecs, q_vec)))
         except Exception:
             emb_scores = {n: 0.0 for n in names}
     else:
@@ -118,64 +198,66 @@ def select_relevant_tables(
     return ranked[:top_k], combined
 
 
+def _table_lines(t: TableInfo, chosen: Set[str]) -> List[str]:
+    """Snippet lines for one table: header with columns, PK, and joins within chosen"""
+    # Table header with columns
+    cols = ", ".join([f"{c.name}:{c.type}" for c in t.columns])
+    lines = [f"- {t.name}({cols})"]
+    
+    # Add primary key info
+    if t.primary_keys:
+        lines.append(f"  PK: {', '.join(t.primary_keys)}")
+    
+    # Relationship hints (only within chosen subset)
+    lines.extend(
+        f"  joins {fk.to_table} ON {t.name}.{fk.from_column} = {fk.to_table}.{fk.to_column}"
+        + (f" [FK {fk.constraint_name}]" if fk.constraint_name else "")
+        for fk in t.foreign_keys if fk.to_table in chosen
+    )
+    return lines
+
+
 def build_schema_snippet(tables: List[TableInfo], schema: DatabaseSchema) -> str:
     """
     Build compact, LLM-friendly schema text.
     Includes relationship hints if neighbors exist in the filtered set.
     """
     chosen = {t.name for t in tables}
-    lines: List[str] = []
-    
-    for t in tables:
-        # Table header with columns
-        cols = ", ".join([f"{c.name}:{c.type}" for c in t.columns])
-        lines.append(f"- {t.name}({cols})")
-        
-        # Add primary key info
-        if t.primary_keys:
-            pk_cols = ", ".join(t.primary_keys)
-            lines.append(f"  PK: {pk_cols}")
-        
-        # Relationship hints (only within chosen subset)
-        for fk in t.foreign_keys:
-            if fk.to_table in chosen:
-                via = f" [FK {fk.constraint_name}]" if fk.constraint_name else ""
-                lines.append(f"  joins {fk.to_table} ON {t.name}.{fk.from_column} = {fk.to_table}.{fk.to_column}{via}")
-    
-    return "\n".join(lines)
+    return "\n".join([line for t in tables for line in _table_lines(t, chosen)])
 
 
 def get_related_tables_for_query(
     schema: DatabaseSchema,
     nl_query: str,
     include_relationships: bool = True,
-    max_tables: int = 10
+    max_tables: int = 10,
+    relevant_tables: Optional[List[TableInfo]] = None
 ) -> List[TableInfo]:
     """
     Get relevant tables for a query, optionally including related tables.
+    Pass relevant_tables when select_relevant_tables has already ranked them.
     """
     # Get initial relevant tables
-    relevant_tables, scores = select_relevant_tables(schema, nl_query, top_k=max_tables)
+    if relevant_tables is None:
+        relevant_tables, scores = select_relevant_tables(schema, nl_query, top_k=max_tables)
+    else:
+        relevant_tables = list(relevant_tables)
     
     if not include_relationships:
         return relevant_tables
     
-    # Find related tables
+    # Find related tables (neighbors in the schema's adjacency index)
     related_tables = set()
     for table in relevant_tables:
-        # Add tables that have foreign key relationships with our relevant tables
-        for rel in schema.relationships:
-            if rel.from_table == table.name:
-                related_tables.add(rel.to_table)
-            elif rel.to_table == table.name:
-                related_tables.add(rel.from_table)
+        related_tables.update(schema.get_related_tables(table.name))
     
     # Add related tables that aren't already in our list
-    for table_name in related_tables:
-        if not any(t.name == table_name for t in relevant_tables):
-            table = schema.get_table(table_name)
-            if table and len(relevant_tables) < max_tables:
-                relevant_tables.append(table)
+    for table_name in related_tables - {t.name for t in relevant_tables}:
+        if len(relevant_tables) >= max_tables:
+            break
+        table = schema.get_table(table_name)
+        if table:
+            relevant_tables.append(table)
     
     return relevant_tables
 
@@ -184,14 +266,16 @@ def create_schema_context(
     schema: DatabaseSchema,
     nl_query: str,
     include_relationships: bool = True,
-    max_tables: int = 8
+    max_tables: int = 8,
+    relevant_tables: Optional[List[TableInfo]] = None
 ) -> str:
     """
     Create a comprehensive schema context for SQL generation.
+    Pass relevant_tables to reuse an earlier select_relevant_tables result.
     """
     # Get relevant tables
     relevant_tables = get_related_tables_for_query(
-        schema, nl_query, include_relationships, max_tables
+        schema, nl_query, include_relationships, max_tables, relevant_tables
     )
     
     # Build schema snippet
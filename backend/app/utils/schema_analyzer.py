@@ -1,30 +1,55 @@
 from __future__ import annotations
 import hashlib
+import heapq
 import re
+from array import array
+from sys import intern
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from typing import Dict, List, Set, Tuple, Optional, Any
-from datetime import datetime
+from datetime import datetime, timezone
 
+import numpy as np
 from sqlalchemy import inspect, text
 from sqlalchemy.engine import Engine
 from sqlalchemy.sql.schema import Column
 
+from .graph_kernels import build_csr, bidirectional_bfs_path
 from ..models.schema import (
     ColumnInfo,
     ForeignKeyRelation,
     TableInfo,
     DatabaseSchema,
-    ColumnType
+    ColumnType,
+    ColumnArrays
 )
 
+# Upper bound on concurrent per-table reflection calls (pre-2.0 SQLAlchemy only)
+_REFLECT_WORKERS = 16
 
+_WS_DASH_RE = re.compile(r"[\s\-]+")
+
+# Common domain synonyms, added when the key appears anywhere in a table name
+_SYNONYMS: Dict[str, Tuple[str, ...]] = {
+    "user": ("customer", "account"),
+    "order": ("purchase", "sale"),
+    "product": ("item", "sku"),
+}
+# Zero-width lookahead so overlapping keys are all found
+_SYNONYM_RE = re.compile("(?=(" + "|".join(map(re.escape, _SYNONYMS)) + "))")
+
+
+@lru_cache(maxsize=2048)
 def _normalize_identifier(name: str) -> str:
     """Normalize table/column names for comparison"""
     s = name.strip().lower()
-    s = re.sub(r"[\s\-]+", "_", s)
+    s = _WS_DASH_RE.sub("_", s)
     return s
 
 
-def _table_aliases(name: str) -> List[str]:
+@lru_cache(maxsize=4096)
+def _table_aliases(name: str) -> Tuple[str, ...]:
     """Generate common aliases for table names"""
     base = _normalize_identifier(name)
     aliases = {base}
@@ -34,15 +59,9 @@ def _table_aliases(name: str) -> List[str]:
         aliases.add(base + "s")
     
     # common domain synonyms
-    syn = {
-        "user": ["customer", "account"],
-        "order": ["purchase", "sale"],
-        "product": ["item", "sku"],
-    }
-    for k, arr in syn.items():
-        if k in base:
-            aliases.update(arr)
-    return sorted(aliases)
+    for k in _SYNONYM_RE.findall(base):
+        aliases.update(_SYNONYMS[k])
+    return tuple(sorted(aliases))
 
 
 def _dialect_from_engine(engine: Engine) -> str:
@@ -57,32 +76,66 @@ def _dialect_from_engine(engine: Engine) -> str:
     return name
 
 
+# Type-name fragments in match priority order; the first rule whose fragment
+# appears anywhere in the type name wins (e.g. DATETIME before DATE and TIME)
+_TYPE_RULES: Tuple[Tuple[str, ColumnType], ...] = (
+    ("INT", ColumnType.INTEGER),  # INT, BIGINT, SMALLINT, INTEGER
+    ("CHAR", ColumnType.VARCHAR),  # CHAR, VARCHAR, NVARCHAR
+    ("TEXT", ColumnType.TEXT),
+    ("REAL", ColumnType.REAL),
+    ("DOUBLE", ColumnType.REAL),
+    ("FLOAT", ColumnType.REAL),
+    ("BLOB", ColumnType.BLOB),
+    ("BOOL", ColumnType.BOOLEAN),  # BOOL, BOOLEAN
+    ("DATETIME", ColumnType.DATETIME),
+    ("DATE", ColumnType.DATE),
+    ("TIME", ColumnType.TIME),
+    ("DECIMAL", ColumnType.DECIMAL),
+)
+_TYPE_PRIORITY = {fragment: i for i, (fragment, _) in enumerate(_TYPE_RULES)}
+# Zero-width lookahead so overlapping fragments (DATETIME/TIME) are all found
+_TYPE_RE = re.compile("(?=(" + "|".join(fragment for fragment, _ in _TYPE_RULES) + "))")
+
+
+@lru_cache(maxsize=1024)
 def _map_column_type(column_type: str) -> ColumnType:
-    """Map database column type to standardized ColumnType enum"""
-    type_str = str(column_type).upper()
-    
-    if any(t in type_str for t in ["INT", "BIGINT", "SMALLINT"]):
-        return ColumnType.INTEGER
-    elif any(t in type_str for t in ["VARCHAR", "CHAR"]):
-        return ColumnType.VARCHAR
-    elif "TEXT" in type_str:
-        return ColumnType.TEXT
-    elif any(t in type_str for t in ["REAL", "DOUBLE", "FLOAT"]):
-        return ColumnType.REAL
-    elif "BLOB" in type_str:
-        return ColumnType.BLOB
-    elif "BOOLEAN" in type_str or "BOOL" in type_str:
-        return ColumnType.BOOLEAN
-    elif "DATETIME" in type_str:
-        return ColumnType.DATETIME
-    elif "DATE" in type_str:
-        return ColumnType.DATE
-    elif "TIME" in type_str:
-        return ColumnType.TIME
-    elif "DECIMAL" in type_str:
-        return ColumnType.DECIMAL
-    else:
+    """Map database column type to standardized ColumnType enum (memoized; schemas reuse few type names)"""
+    found = _TYPE_RE.findall(str(column_type).upper())
+    if not found:
         return ColumnType.UNKNOWN
+    return _TYPE_RULES[min(_TYPE_PRIORITY[f] for f in found)][1]
+
+
+def _reflect_tables(inspector) -> List[Tuple[str, List[Dict[str, Any]], Dict[str, Any], List[Dict[str, Any]]]]:
+    """
+    Reflect (table name, columns, pk constraint, foreign keys) for every table.
+    SQLAlchemy 2.0+ fetches each category for all tables in one pass; older
+    versions fall back to per-table calls, spread over a thread pool since
+    they mostly wait on the database.
+    """
+    table_names = inspector.get_table_names()
+    if not hasattr(inspector, "get_multi_columns"):
+        if not table_names:
+            return []
+
+        def fetch(name: str):
+            return name, inspector.get_columns(name), inspector.get_pk_constraint(name), inspector.get_foreign_keys(name)
+
+        # Each worker checks out its own pooled connection, so stay within the pool
+        workers = min(_REFLECT_WORKERS, len(table_names))
+        pool_size = getattr(getattr(inspector.bind, "pool", None), "size", None)
+        if callable(pool_size):
+            workers = max(1, min(workers, pool_size()))
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            return list(ex.map(fetch, table_names))
+
+    cols_by_table = {name: cols for (_, name), cols in inspector.get_multi_columns().items()}
+    pks_by_table = {name: pk for (_, name), pk in inspector.get_multi_pk_constraint().items()}
+    fks_by_table = {name: fks for (_, name), fks in inspector.get_multi_foreign_keys().items()}
+    return [
+        (name, cols_by_table.get(name, []), pks_by_table.get(name, {}), fks_by_table.get(name, []))
+        for name in table_names
+    ]
 
 
 def introspect_schema(engine: Engine, database_name: Optional[str] = None) -> DatabaseSchema:
@@ -97,43 +150,54 @@ def introspect_schema(engine: Engine, database_name: Optional[str] = None) -> Da
     tables_info: List[TableInfo] = []
     all_relationships: List[ForeignKeyRelation] = []
     total_columns = 0
+    # Flat column arrays, filled alongside the ColumnInfo objects
+    col_names: List[str] = []
+    col_types: List[str] = []
+    col_nullable: List[bool] = []
+    col_table_idx = array("I")
+    table_offsets = array("I", [0])
 
-    for table_name in inspector.get_table_names():
+    for table_name, raw_columns, pk_constraint, raw_foreign_keys in _reflect_tables(inspector):
         # Get columns
         columns_info: List[ColumnInfo] = []
-        raw_columns = inspector.get_columns(table_name)
         
         # Get primary keys
-        pk_constraint = inspector.get_pk_constraint(table_name)
         pk_columns = pk_constraint.get("constrained_columns", [])
+        pk_set = set(pk_columns)
         
-        # Get foreign keys
-        raw_foreign_keys = inspector.get_foreign_keys(table_name)
+        # Get foreign keys, indexed by constrained column (first constraint wins)
         table_foreign_keys: List[ForeignKeyRelation] = []
+        col_to_fk: Dict[str, Dict[str, Any]] = {}
+        for fk in raw_foreign_keys:
+            for c in fk.get("constrained_columns", []):
+                col_to_fk.setdefault(c, fk)
         
         for col in raw_columns:
-            col_name = col["name"]
-            col_type = str(col.get("type", "UNKNOWN"))
+            # Names, types and defaults repeat across tables; intern so equal values share one string
+            col_name = intern(col["name"])
+            raw_type = col.get("type", "UNKNOWN")
+            col_type = intern(str(raw_type))
+            default = col.get("default")
             
             # Check if this column is a foreign key
-            fk_info = None
-            for fk in raw_foreign_keys:
-                if col_name in fk.get("constrained_columns", []):
-                    fk_info = fk
-                    break
+            fk_info = col_to_fk.get(col_name)
             
             column_info = ColumnInfo(
                 name=col_name,
                 type=col_type,
                 type_category=_map_column_type(col_type),
                 nullable=bool(col.get("nullable", True)),
-                primary_key=col_name in pk_columns,
+                primary_key=col_name in pk_set,
                 foreign_key=f"{fk_info['referred_table']}.{fk_info['referred_columns'][0]}" if fk_info else None,
-                default_value=str(col.get("default")) if col.get("default") is not None else None,
-                max_length=getattr(col.get("type"), "length", None) if hasattr(col.get("type"), "length") else None,
+                default_value=intern(str(default)) if default is not None else None,
+                max_length=getattr(raw_type, "length", None),
                 auto_increment=bool(col.get("autoincrement", False))
             )
             columns_info.append(column_info)
+            col_names.append(column_info.name)
+            col_types.append(column_info.type)
+            col_nullable.append(column_info.nullable)
+            col_table_idx.append(len(tables_info))
             
             # Create foreign key relationship
             if fk_info:
@@ -159,6 +223,7 @@ def introspect_schema(engine: Engine, database_name: Optional[str] = None) -> Da
             table_comment=None
         )
         tables_info.append(table_info)
+        table_offsets.append(len(col_names))
 
     # Create database schema
     schema = DatabaseSchema(
@@ -168,50 +233,62 @@ def introspect_schema(engine: Engine, database_name: Optional[str] = None) -> Da
         relationships=all_relationships,
         total_tables=len(tables_info),
         schema_version="1.0",
-        extracted_at=datetime.utcnow().isoformat()
+        extracted_at=datetime.now(timezone.utc).isoformat()
     )
+    schema._column_arrays = ColumnArrays(col_names, col_types, col_nullable, col_table_idx, table_offsets)
     
     return schema
 
 
+def _column_arrays(schema: DatabaseSchema) -> ColumnArrays:
+    """Flat column arrays of a schema, built once if introspection didn't set them"""
+    arrays = schema._column_arrays
+    if arrays is None:
+        arrays = schema._column_arrays = ColumnArrays.from_tables(schema.tables)
+    return arrays
+
+
+def _join_graph(schema: DatabaseSchema) -> Tuple[List[str], np.ndarray, np.ndarray, Dict[str, int]]:
+    """CSR-encoded undirected relationship graph, built once per schema"""
+    graph = schema._join_graph
+    if graph is None:
+        pairs = [(rel.from_table, rel.to_table) for rel in schema.relationships]
+        nodes = list(dict.fromkeys(t for pair in pairs for t in pair))
+        indptr, indices, node_ids = build_csr(nodes, pairs)
+        graph = schema._join_graph = (nodes, indptr, indices, node_ids)
+    return graph
+
+
+def _edge_index(schema: DatabaseSchema) -> Dict[Tuple[str, str], ForeignKeyRelation]:
+    """First relationship between each ordered table pair (either direction), built once per schema"""
+    index = schema._edge_index
+    if index is None:
+        index = {}
+        add = index.setdefault
+        for rel in schema.relationships:
+            ft, tt = rel.from_table, rel.to_table
+            add((ft, tt), rel)
+            add((tt, ft), rel)
+        schema._edge_index = index
+    return index
+
+
 def find_shortest_join_path(schema: DatabaseSchema, start: str, end: str) -> Optional[List[str]]:
     """
-    Find shortest join path between two tables using BFS.
+    Find shortest join path between two tables using BFS from both ends.
     Returns list of table names in the path.
     """
     if start == end:
         return [start]
-    
-    # Build adjacency list from relationships
-    graph: Dict[str, List[str]] = {}
-    for rel in schema.relationships:
-        if rel.from_table not in graph:
-            graph[rel.from_table] = []
-        if rel.to_table not in graph:
-            graph[rel.to_table] = []
-        graph[rel.from_table].append(rel.to_table)
-        graph[rel.to_table].append(rel.from_table)
-    
-    if start not in graph or end not in graph:
+
+    nodes, indptr, indices, node_ids = _join_graph(schema)
+    if start not in node_ids or end not in node_ids:
         return None
-    
-    # BFS to find shortest path
-    from collections import deque
-    queue = deque([(start, [start])])
-    visited = {start}
-    
-    while queue:
-        current, path = queue.popleft()
-        
-        for neighbor in graph[current]:
-            if neighbor == end:
-                return path + [neighbor]
-            
-            if neighbor not in visited:
-                visited.add(neighbor)
-                queue.append((neighbor, path + [neighbor]))
-    
-    return None
+
+    path = bidirectional_bfs_path(indptr, indices, node_ids[start], node_ids[end], len(nodes))
+    if path.size == 0:
+        return None
+    return [nodes[i] for i in path]
 
 
 def materialize_join_edges(schema: DatabaseSchema, path: List[str]) -> List[ForeignKeyRelation]:
@@ -223,17 +300,13 @@ def materialize_join_edges(schema: DatabaseSchema, path: List[str]) -> List[Fore
         return []
     
     edges: List[ForeignKeyRelation] = []
+    edge_index = _edge_index(schema)
     
     for i in range(len(path) - 1):
         table1, table2 = path[i], path[i + 1]
         
         # Find foreign key relationship between these tables
-        found_relation = None
-        for rel in schema.relationships:
-            if ((rel.from_table == table1 and rel.to_table == table2) or
-                (rel.from_table == table2 and rel.to_table == table1)):
-                found_relation = rel
-                break
+        found_relation = edge_index.get((table1, table2))
         
         if found_relation:
             edges.append(found_relation)
@@ -255,53 +328,53 @@ def analyze_relationships(schema: DatabaseSchema) -> Dict[str, Any]:
     """
     Analyze relationships in the schema and return statistics.
     """
-    analysis = {
-        "total_tables": len(schema.tables),
-        "total_relationships": len(schema.relationships),
-        "tables_with_relationships": len(set(
-            rel.from_table for rel in schema.relationships
-        ).union(set(rel.to_table for rel in schema.relationships))),
-        "isolated_tables": [],
-        "relationship_distribution": {},
-        "most_connected_tables": []
-    }
+    rels = schema.relationships
     
-    # Find isolated tables (no relationships)
-    connected_tables = set()
-    for rel in schema.relationships:
-        connected_tables.add(rel.from_table)
-        connected_tables.add(rel.to_table)
+    # Count relationships per table; the keys are the connected tables
+    table_relationship_count = Counter(t for rel in rels for t in (rel.from_table, rel.to_table))
     
     all_tables = {table.name for table in schema.tables}
-    analysis["isolated_tables"] = list(all_tables - connected_tables)
     
-    # Count relationships per table
-    table_relationship_count = {}
-    for rel in schema.relationships:
-        table_relationship_count[rel.from_table] = table_relationship_count.get(rel.from_table, 0) + 1
-        table_relationship_count[rel.to_table] = table_relationship_count.get(rel.to_table, 0) + 1
-    
-    # Find most connected tables
-    sorted_tables = sorted(table_relationship_count.items(), key=lambda x: x[1], reverse=True)
-    analysis["most_connected_tables"] = sorted_tables[:5]
-    
-    return analysis
+    return {
+        "total_tables": len(schema.tables),
+        "total_relationships": len(rels),
+        "tables_with_relationships": len(table_relationship_count),
+        # Tables with no relationships
+        "isolated_tables": list(all_tables - table_relationship_count.keys()),
+        "relationship_distribution": {},
+        "most_connected_tables": heapq.nlargest(5, table_relationship_count.items(), key=lambda x: x[1])
+    }
 
 
 def generate_schema_hash(schema: DatabaseSchema) -> str:
     """
     Generate a deterministic hash of the schema for change detection.
+    Fields are fed to the hash one at a time instead of being joined first.
+    Computed once per schema object; schemas are not modified after loading.
     """
-    hash_input = []
+    if schema._schema_hash is not None:
+        return schema._schema_hash
+    
+    h = hashlib.blake2b(digest_size=8, usedforsecurity=False)
+    
+    def add(*fields: str) -> None:
+        for field in fields:
+            h.update(field.encode("utf-8"))
+            h.update(b"|")
+    
+    arrays = _column_arrays(schema)
+    names, types, nullable, offsets = arrays.names, arrays.types, arrays.nullable, arrays.table_offsets
     
     # Sort tables and columns for deterministic output
-    for table in sorted(schema.tables, key=lambda x: x.name):
-        hash_input.append(table.name)
-        for col in sorted(table.columns, key=lambda x: x.name):
-            hash_input.extend([col.name, col.type, "1" if col.nullable else "0"])
+    tables = schema.tables
+    for t in sorted(range(len(tables)), key=lambda i: tables[i].name):
+        table = tables[t]
+        add(table.name)
+        for i in sorted(range(offsets[t], offsets[t + 1]), key=names.__getitem__):
+            add(names[i], types[i], "1" if nullable[i] else "0")
         
         for fk in sorted(table.foreign_keys, key=lambda x: (x.from_table, x.to_table)):
-            hash_input.extend([fk.from_table, fk.to_table, fk.from_column, fk.to_column])
+            add(fk.from_table, fk.to_table, fk.from_column, fk.to_column)
     
-    hash_string = "|".join(hash_input)
-    return hashlib.sha256(hash_string.encode("utf-8")).hexdigest()[:16]
\ No newline at end of file
+    schema._schema_hash = h.hexdigest()
+    return schema._schema_hash
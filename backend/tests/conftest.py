@@ -0,0 +1,61 @@
+import sqlite3
+
+import pytest
+from sqlalchemy import create_engine
+
+from app.utils.schema_analyzer import introspect_schema
+
+SHOP_DDL = """
+CREATE TABLE customers (
+    customer_id INTEGER PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    email VARCHAR(255),
+    created_at DATETIME
+);
+CREATE TABLE products (
+    product_id INTEGER PRIMARY KEY,
+    title VARCHAR(200) NOT NULL,
+    price DECIMAL(10, 2) NOT NULL
+);
+CREATE TABLE orders (
+    order_id INTEGER PRIMARY KEY,
+    customer_id INTEGER NOT NULL REFERENCES customers (customer_id),
+    ordered_at DATETIME NOT NULL
+);
+CREATE TABLE order_items (
+    order_id INTEGER NOT NULL REFERENCES orders (order_id),
+    product_id INTEGER NOT NULL REFERENCES products (product_id),
+    quantity INTEGER NOT NULL,
+    PRIMARY KEY (order_id, product_id)
+);
+CREATE TABLE audit_log (
+    entry_id INTEGER PRIMARY KEY,
+    message TEXT
+);
+INSERT INTO customers VALUES (1, 'Ada', 'ada@example.com', NULL), (2, 'Grace', NULL, NULL);
+INSERT INTO products VALUES (1, 'Keyboard', 49.5), (2, 'Mouse', 19.0), (3, 'Monitor', 199.0);
+INSERT INTO orders VALUES (1, 1, '2024-01-01'), (2, 1, '2024-02-01'), (3, 2, '2024-03-01');
+INSERT INTO order_items VALUES (1, 1, 1), (1, 2, 2), (2, 3, 1), (3, 2, 1);
+"""
+
+
+@pytest.fixture
+def shop_db_path(tmp_path):
+    """Path of a small SQLite shop database with foreign keys"""
+    path = tmp_path / "shop.db"
+    conn = sqlite3.connect(path)
+    conn.executescript(SHOP_DDL)
+    conn.close()
+    return path
+
+
+@pytest.fixture
+def shop_engine(shop_db_path):
+    engine = create_engine(f"sqlite:///{shop_db_path}")
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def shop_schema(shop_engine):
+    return introspect_schema(shop_engine)
@@ -0,0 +1,124 @@
+import pytest
+
+from app.services import cache_service as cache_service_module
+from app.services.cache_service import CacheService
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache_service_module.time, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def cache(clock):
+    return CacheService(max_size=3, cleanup_interval=0, entry_pool_size=2)
+
+
+def test_get_returns_stored_value(cache):
+    cache.set("a", {"x": 1})
+
+    assert cache.get("a") == {"x": 1}
+    assert cache.get("missing") is None
+
+
+def test_least_recently_used_entry_is_evicted(cache):
+    for key in ("a", "b", "c"):
+        cache.set(key, key)
+    cache.get("a")
+    cache.set("d", "d")
+
+    assert cache.get("b") is None
+    assert [cache.get(k) for k in ("a", "c", "d")] == ["a", "c", "d"]
+
+
+def test_replacing_a_key_does_not_evict(cache):
+    for key in ("a", "b", "c"):
+        cache.set(key, key)
+    cache.set("a", "new")
+
+    assert [cache.get(k) for k in ("a", "b", "c")] == ["new", "b", "c"]
+
+
+def test_entries_expire_after_ttl(cache, clock):
+    cache.set("short", 1, ttl_seconds=10)
+    cache.set("long", 2, ttl_seconds=100)
+    clock.now += 11
+
+    assert not cache.exists("short")
+    assert cache.get("short") is None
+    assert cache.get("long") == 2
+
+
+def test_cleanup_drops_expired_entries(cache, clock):
+    cache.set("a", 1, ttl_seconds=10)
+    cache.set("b", 2, ttl_seconds=100)
+    clock.now += 50
+    cache._cleanup_expired()
+
+    assert list(cache._cache) == ["b"]
+
+
+def test_removed_entries_are_recycled(cache):
+    cache.set("a", ["payload"])
+    entry = cache._cache["a"]
+    cache.delete("a")
+
+    assert cache._entry_pool == [entry]
+    assert entry.value is None  # the pool doesn't keep values alive
+
+    cache.set("b", 2)
+    assert cache._cache["b"] is entry
+    assert cache._entry_pool == []
+    assert (entry.key, entry.value, entry.access_count) == ("b", 2, 0)
+
+
+def test_entry_pool_is_bounded(cache):
+    for key in ("a", "b", "c"):
+        cache.set(key, key)
+    cache.clear(prefix="")
+
+    assert len(cache._entry_pool) == 2
+
+
+def test_clear_by_prefix(cache):
+    cache.set_statistics("db", "t1", {"row_count": 1})
+    cache.set_statistics("db", "t2", {"row_count": 2})
+    cache.set_join_paths("db", "a", "b", [])
+
+    assert cache.clear(cache.PREFIXES["statistics"]) == 2
+    assert cache.get_join_paths("db", "a", "b") == []
+
+
+def test_clear_schema_cache_drops_schema_and_response(cache, shop_schema):
+    cache.set_schema("db", shop_schema)
+    cache.set_schema_response("db", 1.0, b"{}")
+    cache.set_schema_response("other", 1.0, b"{}")
+
+    assert cache.clear_schema_cache("db") == 2
+    assert cache.get_schema("db") is None
+    assert cache.get_schema_response("db") is None
+    assert cache.get_schema_response("other") == (1.0, b"{}")
+
+
+def test_stats(cache, clock):
+    cache.set("a", {"x": 1}, ttl_seconds=10)
+    cache.set("b", "hello", ttl_seconds=100)
+    cache.get("b")
+    cache.get("b")
+    clock.now += 20
+
+    stats = cache.get_stats()
+    assert stats["total_entries"] == 2
+    assert stats["expired_entries"] == 1
+    assert stats["total_access_count"] == 2
+    assert stats["estimated_memory_bytes"] == len(b'{"x":1}') + len(b'"hello"')
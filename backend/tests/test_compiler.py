@@ -0,0 +1,117 @@
+import pytest
+
+from app.core.compiler import compile_ast
+
+
+def select(**parts):
+    return {"type": "select", "select": ["*"], "from": {"table": "orders"}, **parts}
+
+
+def test_select_with_joins():
+    ast = {
+        "select": [{"expr": "c.name"}, {"expr": "o.order_id", "agg": "COUNT", "alias": "orders"}],
+        "from": {"table": "customers", "alias": "c"},
+        "joins": [
+            {"type": "LEFT", "table": "orders", "alias": "o",
+             "on": {"left": "o.customer_id", "op": "=", "right": "c.customer_id"}},
+            {"type": "cross", "table": "products", "alias": "p"},
+        ],
+        "group_by": ["c.name"],
+        "order_by": [{"expr": "c.name", "dir": "desc"}],
+        "limit": 10,
+    }
+
+    assert compile_ast(ast, "sqlite") == (
+        "SELECT c.name, COUNT(o.order_id) AS orders FROM customers c "
+        "LEFT JOIN orders o ON o.customer_id = c.customer_id "
+        "CROSS JOIN products p GROUP BY c.name ORDER BY c.name DESC LIMIT 10"
+    )
+
+
+def test_nested_where():
+    where = {"op": "OR", "args": [
+        {"op": "AND", "args": [
+            {"left": "status", "op": "=", "right": {"value": "open"}},
+            {"left": "total", "op": ">=", "right": 100.5},
+        ]},
+        {"op": "NOT", "arg": {"left": "closed_at", "op": "IS NULL"}},
+    ]}
+
+    assert compile_ast(select(where=where), "sqlite") == (
+        "SELECT * FROM orders WHERE ((status = 'open' AND total >= 100.5) OR NOT (closed_at IS NULL))"
+    )
+
+
+def test_in_list_and_between():
+    where = {"op": "AND", "args": [
+        {"left": "status", "op": "in", "right": {"value": ["open", "it's late", 3]}},
+        {"left": "total", "op": "BETWEEN", "right": [1, {"value": 9}]},
+    ]}
+
+    assert compile_ast(select(where=where), "sqlite") == (
+        "SELECT * FROM orders WHERE (status IN ('open', 'it''s late', 3) AND total BETWEEN 1 AND 9)"
+    )
+
+
+@pytest.mark.parametrize("dialect, expected", [
+    ("sqlite", 'SELECT "order date" FROM "order items" WHERE paid = 1'),
+    ("postgresql", 'SELECT "order date" FROM "order items" WHERE paid = TRUE'),
+    ("mysql", "SELECT `order date` FROM `order items` WHERE paid = TRUE"),
+])
+def test_dialect_quoting(dialect, expected):
+    ast = {
+        "select": ["order date"],
+        "from": {"table": "order items"},
+        "where": {"left": "paid", "op": "=", "right": {"value": True}},
+    }
+
+    assert compile_ast(ast, dialect) == expected
+
+
+def test_quote_characters_in_identifiers_are_doubled():
+    ast = {"select": ['we"ird'], "from": {"table": "t"}}
+
+    assert compile_ast(ast, "sqlite") == 'SELECT "we""ird" FROM t'
+
+
+def test_mssql_limit_uses_top():
+    assert compile_ast(select(limit=5), "mssql") == "SELECT TOP 5 * FROM orders"
+
+
+@pytest.mark.parametrize("where", [
+    {"left": "a", "op": "REGEXP", "right": 1},
+    {"left": "a", "op": "=; DROP TABLE orders", "right": 1},
+    {"op": "XOR", "args": [{"left": "a", "op": "IS NULL"}]},
+    {"op": "AND", "args": []},
+])
+def test_rejects_unknown_operators(where):
+    with pytest.raises(ValueError):
+        compile_ast(select(where=where), "sqlite")
+
+
+@pytest.mark.parametrize("ast", [
+    select(type="delete"),
+    select(select=[{"expr": {"func": "LOAD_EXTENSION", "args": []}}]),
+    select(select=[{"expr": "a", "agg": "MEDIAN"}]),
+    select(joins=[{"type": "NATURAL", "table": "t", "on": {"left": "a", "op": "IS NULL"}}]),
+    select(order_by=[{"expr": "a", "dir": "SIDEWAYS"}]),
+    select(limit=-1),
+    select(limit="10"),
+    select(joins=[{"table": "t"}]),
+])
+def test_rejects_unsupported_queries(ast):
+    with pytest.raises(ValueError):
+        compile_ast(ast, "sqlite")
+
+
+@pytest.mark.parametrize("value", [float("nan"), float("inf"), float("-inf")])
+def test_rejects_non_finite_floats(value):
+    with pytest.raises(ValueError):
+        compile_ast(select(where={"left": "total", "op": ">", "right": {"value": value}}), "sqlite")
+    with pytest.raises(ValueError):
+        compile_ast(select(where={"left": "total", "op": ">", "right": value}), "sqlite")
+
+
+def test_rejects_non_object_ast():
+    with pytest.raises(ValueError):
+        compile_ast(["select"], "sqlite")
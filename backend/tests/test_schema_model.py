@@ -0,0 +1,43 @@
+def path_pairs(path):
+    return [(r.from_table, r.from_column, r.to_table, r.to_column) for r in path]
+
+
+def test_directly_related_tables(shop_schema):
+    assert path_pairs(shop_schema.get_join_path("Customers", "ORDERS")) == [
+        ("orders", "customer_id", "customers", "customer_id")
+    ]
+
+
+def test_shortest_path_through_junction_table(shop_schema):
+    assert path_pairs(shop_schema.get_join_path("orders", "products")) == [
+        ("order_items", "order_id", "orders", "order_id"),
+        ("order_items", "product_id", "products", "product_id"),
+    ]
+
+
+def test_path_in_either_direction(shop_schema):
+    forward = shop_schema.get_join_path("customers", "products")
+    backward = shop_schema.get_join_path("products", "customers")
+
+    assert len(forward) == 3
+    assert path_pairs(backward) == list(reversed(path_pairs(forward)))
+
+
+def test_max_depth_limits_path_length(shop_schema):
+    assert shop_schema.get_join_path("customers", "products", max_depth=2) == []
+    assert len(shop_schema.get_join_path("customers", "products", max_depth=3)) == 3
+
+
+def test_unreachable_and_unknown_tables(shop_schema):
+    assert shop_schema.get_join_path("customers", "audit_log") == []
+    assert shop_schema.get_join_path("customers", "missing") == []
+    assert shop_schema.get_join_path("missing", "customers") == []
+    assert shop_schema.get_join_path("orders", "orders") == []
+
+
+def test_paths_are_cached_per_depth(shop_schema):
+    first = shop_schema.get_join_path("orders", "products")
+    first.clear()  # callers get a copy
+
+    assert len(shop_schema.get_join_path("orders", "products")) == 2
+    assert ("orders", "products", 3) in shop_schema._join_paths
@@ -0,0 +1,119 @@
+import pytest
+
+from app.services.cache_service import cache_service
+from app.services.schema_service import SchemaService
+
+
+@pytest.fixture
+def service(shop_engine):
+    service = SchemaService()
+    service.set_engine(shop_engine)
+    yield service
+    database_name = str(shop_engine.url)
+    cache_service.clear_schema_cache(database_name)
+    cache_service.clear(cache_service.PREFIXES["statistics"])
+
+
+def relationship_pairs(relationships):
+    return {(r.from_table, r.from_column, r.to_table, r.to_column) for r in relationships}
+
+
+def test_search_tables_is_case_insensitive(service):
+    result = service.search_schema("ORDER", "tables")
+
+    assert result["success"]
+    assert sorted(result["results"]["tables"]) == ["order_items", "orders"]
+    assert set(result["results"]) == {"tables"}
+    assert result["total_matches"] == 2
+
+
+def test_search_columns(service):
+    result = service.search_schema("_at", "columns")
+
+    found = {(c["table"], c["column"]) for c in result["results"]["columns"]}
+    assert found == {("customers", "created_at"), ("orders", "ordered_at")}
+
+
+def test_search_relationships_matches_either_end(service):
+    result = service.search_schema("product", "relationships")
+
+    assert relationship_pairs(result["results"]["relationships"]) == {
+        ("order_items", "product_id", "products", "product_id")
+    }
+
+
+def test_search_all_counts_every_section(service):
+    result = service.search_schema("customer", "all")
+
+    assert set(result["results"]) == {"tables", "columns", "relationships"}
+    assert result["results"]["tables"] == ["customers"]
+    assert result["total_matches"] == sum(len(v) for v in result["results"].values())
+
+
+def test_search_rejects_unknown_type(service):
+    result = service.search_schema("customer", "indexes")
+
+    assert not result["success"]
+    assert "indexes" in result["error"]
+
+
+def test_table_statistics(service):
+    result = service.get_table_statistics("ORDER_ITEMS")
+
+    assert result["success"]
+    assert result["table_name"] == "order_items"
+    stats = result["statistics"]
+    assert stats["row_count"] == 4
+    assert stats["column_count"] == 3
+    assert stats["foreign_key_count"] == 2
+    assert sorted(stats["primary_keys"]) == ["order_id", "product_id"]
+
+
+def test_table_statistics_uses_given_connection(service, shop_engine):
+    with shop_engine.connect() as conn:
+        result = service.get_table_statistics("customers", conn)
+
+    assert result["statistics"]["row_count"] == 2
+    assert result["statistics"]["column_count"] == 4
+
+
+def test_table_statistics_are_cached(service, shop_engine):
+    service.get_table_statistics("products")
+    with shop_engine.begin() as conn:
+        conn.exec_driver_sql("DELETE FROM products")
+
+    assert service.get_table_statistics("products")["statistics"]["row_count"] == 3
+
+
+def test_table_statistics_unknown_table(service):
+    result = service.get_table_statistics("missing")
+
+    assert not result["success"]
+    assert result["error"] == "Table does not exist"
+
+
+def test_relationships_for_all_tables(service):
+    result = service.get_relationships()
+
+    assert relationship_pairs(result["relationships"]) == {
+        ("orders", "customer_id", "customers", "customer_id"),
+        ("order_items", "order_id", "orders", "order_id"),
+        ("order_items", "product_id", "products", "product_id"),
+    }
+
+
+def test_relationships_for_one_table(service):
+    result = service.get_relationships("Orders")
+
+    assert relationship_pairs(result["relationships"]) == {
+        ("orders", "customer_id", "customers", "customer_id"),
+        ("order_items", "order_id", "orders", "order_id"),
+    }
+    assert service.get_relationships("audit_log")["relationships"] == []
+
+
+def test_related_tables(service):
+    result = service.get_related_tables("orders")
+
+    assert result["related_tables"] == ["customers", "order_items"]
+    assert not service.get_related_tables("missing")["success"]
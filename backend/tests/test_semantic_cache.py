@@ -0,0 +1,139 @@
+import asyncio
+
+import pytest
+
+from app.models.responses import SQLGenerationResponse
+from app.services import semantic_cache as semantic_cache_module
+from app.services.semantic_cache import SemanticSQLCache, _UNSAFE_PARAM_RE, _parameterize, _sql_template
+
+SCOPE = "sqlite:0123abcd"
+
+VECTORS = {
+    "list all artists": [1.0, 0.0, 0.0],
+    "show every artist": [0.99, 0.1, 0.0],
+    "count invoices": [0.0, 1.0, 0.0],
+}
+
+
+@pytest.fixture(autouse=True)
+def fake_embeddings(monkeypatch):
+    """Deterministic embeddings; unknown queries have none"""
+    monkeypatch.setattr(semantic_cache_module, "embed_query", VECTORS.get)
+
+
+def response(sql):
+    return SQLGenerationResponse(sql=sql, explanation="generated", confidence=0.9, execution_time=0.1)
+
+
+def lookup(cache, query, scope=SCOPE):
+    hit, _ = asyncio.run(cache.lookup(scope, query))
+    return hit.sql if hit is not None else None
+
+
+@pytest.fixture
+def cache():
+    cache = SemanticSQLCache()
+    cache.store(SCOPE, "show top 5 customers", response("SELECT * FROM Customer LIMIT 5"))
+    cache.store(SCOPE, "customers in 'Paris'", response("SELECT * FROM Customer WHERE City = 'Paris'"))
+    return cache
+
+
+def test_parameterize_keeps_quotes_around_placeholders():
+    template, params = _parameterize("Top 5 Customers in  'New York' or \"Paris\"")
+
+    assert template == "top {p0} customers in '{p1}' or \"{p2}\""
+    assert params == ["5", "New York", "Paris"]
+
+
+def test_sql_template_requires_each_value_exactly_once():
+    assert _sql_template("SELECT * FROM t WHERE a = 'x' LIMIT 5", ["x", "5"]) == "SELECT * FROM t WHERE a = '{p0}' LIMIT {p1}"
+    assert _sql_template("SELECT 5 FROM t LIMIT 5", ["5"]) is None
+    assert _sql_template("SELECT * FROM t", ["5", "5"]) is None
+    assert _sql_template("SELECT * FROM t", []) is None
+
+
+def test_exact_hit_ignores_case_and_whitespace(cache):
+    assert lookup(cache, "  Show TOP 5   customers ") == "SELECT * FROM Customer LIMIT 5"
+    assert cache.get_stats()["exact_hits"] == 1
+
+
+def test_template_hit_substitutes_literals(cache):
+    assert lookup(cache, "show top 10 customers") == "SELECT * FROM Customer LIMIT 10"
+    assert lookup(cache, "customers in 'Berlin'") == "SELECT * FROM Customer WHERE City = 'Berlin'"
+    assert cache.get_stats()["template_hits"] == 2
+
+
+def test_template_hit_is_scoped(cache):
+    assert lookup(cache, "show top 10 customers", scope="sqlite:other") is None
+
+
+@pytest.mark.parametrize("value", ["x'; DROP TABLE Customer; --", "a--b", "a;b", "New York", 'a"b'])
+def test_unsafe_param_re_matches_injection_characters(value):
+    assert _UNSAFE_PARAM_RE.search(value)
+
+
+@pytest.mark.parametrize("query", [
+    "customers in 'x'' OR 1=1 --'",
+    "customers in 'Paris; DROP TABLE Customer'",
+    "customers in 'a--b'",
+    'show top "5; DROP TABLE Customer" customers',
+    "customers in 'New York'",
+])
+def test_template_rejects_unsafe_values(cache, query):
+    assert lookup(cache, query) is None
+
+
+def test_template_rejects_quoted_value_in_bare_position(cache):
+    # The template was learned from a bare number; a quoted value is a different template
+    assert lookup(cache, 'show top "10" customers') is None
+
+
+def test_template_hit_is_validated():
+    cache = SemanticSQLCache()
+    cache.store(SCOPE, "rows from table 'Customer'", response("SELECT * FROM \"Customer\""))
+
+    assert lookup(cache, "rows from table 'Invoice'") == "SELECT * FROM \"Invoice\""
+    assert lookup(cache, "rows from table 'DROP'") is None
+
+
+def test_semantic_hit_uses_embeddings(cache):
+    cache.store(SCOPE, "list all artists", response("SELECT * FROM Artist"), VECTORS["list all artists"])
+
+    assert lookup(cache, "show every artist") == "SELECT * FROM Artist"
+    assert lookup(cache, "count invoices") is None
+    stats = cache.get_stats()
+    assert stats["semantic_hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_exact_and_template_tiers_are_bounded():
+    cache = SemanticSQLCache(max_size=2)
+    for table in ("customer", "invoice", "artist"):
+        cache.store(SCOPE, f"top 5 from {table}", response(f"SELECT * FROM {table} LIMIT 5"))
+    scope = cache._scopes[SCOPE]
+
+    assert len(scope.exact) == 2
+    assert list(scope.templates) == ["top {p0} from invoice", "top {p0} from artist"]
+    assert lookup(cache, "top 9 from customer") is None
+
+
+def test_scopes_are_bounded():
+    cache = SemanticSQLCache(max_scopes=2)
+    for n in range(3):
+        cache.store(f"sqlite:{n}", "show top 5 customers", response("SELECT * FROM Customer LIMIT 5"))
+
+    assert list(cache._scopes) == ["sqlite:1", "sqlite:2"]
+
+
+def test_entries_persist_and_reload(tmp_path):
+    path = str(tmp_path / "cache" / "semantic.db")
+    SemanticSQLCache(db_path=path, max_scopes=1).store(SCOPE, "show top 5 customers", response("SELECT * FROM Customer LIMIT 5"))
+
+    reloaded = SemanticSQLCache(db_path=path)
+    assert lookup(reloaded, "show top 5 customers") == "SELECT * FROM Customer LIMIT 5"
+    assert lookup(reloaded, "show top 7 customers") == "SELECT * FROM Customer LIMIT 7"
+
+
+def test_clear(cache):
+    assert cache.clear(SCOPE) == 2
+    assert lookup(cache, "show top 5 customers") is None
@@ -0,0 +1,69 @@
+import pytest
+
+from app.core import validators
+from app.core.validators import is_mutating, validate_sql
+
+
+@pytest.fixture(params=["hyperscan", "regex"])
+def scanner(request, monkeypatch):
+    """Run a test against both keyword scanners"""
+    if request.param == "hyperscan":
+        if validators._HS_DB is None:
+            pytest.skip("hyperscan is not installed")
+    else:
+        monkeypatch.setattr(validators, "_HS_DB", None)
+    return request.param
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT * FROM customers WHERE note = 'please delete me'",
+    "SELECT * FROM customers WHERE note = 'it''s a DROP TABLE x'",
+    "SELECT 1 -- drop table customers",
+    "SELECT /* UPDATE customers SET name = 1 */ name FROM customers",
+    "SELECT created_at, updated_at, deleted FROM customers",
+    "SELECT * FROM customers WHERE note = 'unterminated delete",
+])
+def test_keywords_in_literals_comments_and_identifiers_are_allowed(scanner, sql):
+    assert not is_mutating(sql)
+
+
+@pytest.mark.parametrize("sql", [
+    "DELETE FROM customers",
+    "select 1; drop table x",
+    "SELECT 1; DROP TABLE x",
+    "SELECT 'a' ; INSERT INTO t VALUES (1)",
+    "SELECT 1 /* comment */ ; UPDATE t SET a = 1",
+    "WITH gone AS (DELETE FROM t RETURNING *) SELECT * FROM gone",
+    "WITH x AS (SELECT 1) INSERT INTO t SELECT * FROM x",
+    "SELECT 1 -- comment\nDROP TABLE x",
+    b"ATTACH DATABASE 'other.db' AS other",
+])
+def test_mutating_statements_are_detected(scanner, sql):
+    assert is_mutating(sql)
+
+
+def test_validate_accepts_read_queries(scanner):
+    validate_sql("SELECT name FROM customers WHERE note = 'drop'", "sqlite")
+    validate_sql("WITH x AS (SELECT 1 AS a) SELECT a FROM x", "sqlite")
+    validate_sql("SELECT a FROM t UNION SELECT b FROM u", "postgresql")
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT 1; DROP TABLE x",
+    "WITH gone AS (DELETE FROM t RETURNING *) SELECT * FROM gone",
+    "  \n ",
+])
+def test_validate_rejects_unsafe_sql(scanner, sql):
+    with pytest.raises(ValueError):
+        validate_sql(sql, "sqlite")
+
+
+@pytest.mark.skipif(validators.sqlglot is None, reason="sqlglot is not installed")
+@pytest.mark.parametrize("sql, message", [
+    ("SELECT 1; SELECT 2", "single statement"),
+    ("SELECT FROM WHERE (", "invalid"),
+    ("PRAGMA table_info(customers)", "read query"),
+])
+def test_validate_structure(sql, message):
+    with pytest.raises(ValueError, match=message):
+        validate_sql(sql, "sqlite")